@@ -1,11 +1,21 @@
 import streamlit as st
 import pandas as pd
 import uuid
+import hashlib
 import os
+import smtplib
+import tempfile
 
 # Importer les fonctions de génération
-from matplotlib_chart import create_daily_chart_matplotlib, create_radar_chart, create_triangle_chart
-from hrv_pdf import generate_hrv_report
+from matplotlib_chart import (
+    create_daily_chart_matplotlib, create_radar_chart, create_triangle_chart, create_period_heatmap
+)
+from hrv_pdf import generate_hrv_report, generate_hrv_report_sharded, generate_individual_reports
+from hrv_delivery import deliver_to_folders, send_reports_smtp
+from hrv_html import generate_hrv_report_html
+from hrv_memory import memory_probe
+from hrv_trends import athlete_trend_alerts
+from hrv_cache import ReportCache, report_fingerprint
 
 # ---------------------------
 # CONFIGURATION DE LA PAGE
@@ -22,11 +32,46 @@ st.title("💓 Générateur de rapport HRV")
 TEMP_DIR = "./temp_chart"
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+# Logos et icônes de légende (communs au rapport et aux rapports individuels)
+LEFT_LOGO = "./icons/Logo_ASM_Clermont_Auvergne_2019.png"
+RIGHT_LOGO = "./icons/Elite-logo-dark.png"
+LEGEND_ICONS = {
+    "menstruation": "./icons/menstruation.png",
+    "ok": "./icons/ok.png",
+    "vigilance": "./icons/vigilance.png",
+    "danger": "./icons/danger.png",
+}
+
+# Cache des rapports PDF terminés, partagé par toutes les sessions du serveur
+REPORT_CACHE_ENTRIES = 32
+REPORT_CACHE_MB = 256
+
+@st.cache_resource
+def get_report_cache():
+    return ReportCache(max_entries=REPORT_CACHE_ENTRIES, max_bytes=REPORT_CACHE_MB * 2**20)
+
+# Mesure des allocations Python (tracemalloc) à chaque rapport : diagnostic uniquement, très lent
+MEMORY_TRACE = os.environ.get("HRV_MEMORY_TRACE") == "1"
+
+# Au-delà de ce nombre d'athlètes, les pages sont rendues en parallèle (plusieurs processus).
+# Chaque clic démarre un nouveau pool de processus : ce n'est rentable qu'à l'échelle
+# du club entier (30 athlètes : 8,4 s en parallèle contre 0,15 s en séquentiel)
+SHARDED_MIN_ATHLETES = 300
+
 # ---------------------------
 # EN-TÊTE : date et ajout de lignes
 # ---------------------------
 st.subheader("📅 Informations générales")
 selected_date = st.date_input("Sélectionnez la date du rapport", format="DD/MM/YYYY")
+pdf_profile = st.selectbox(
+    "Format du PDF",
+    ["screen", "print", "archive"],
+    format_func={
+        "screen": "📱 Écran (léger, pour téléphone)",
+        "print": "🖨️ Impression",
+        "archive": "🗄️ Archive (images d'origine)",
+    }.get,
+)
 
 st.markdown("---")
 
@@ -155,7 +200,8 @@ if "to_delete_id" in st.session_state:
     st.rerun()
 
 # DataFrame final
-df_athletes = pd.DataFrame([{k: v for k, v in a.items() if k != "id"} for a in st.session_state["athletes"]])
+df_athletes = pd.DataFrame([{k: v for k, v in a.items() if k not in ("id", "Alertes tendance")}
+                            for a in st.session_state["athletes"]])
 
 # ---------------------------
 # ACCORDÉON : Paramètres de référence
@@ -235,6 +281,98 @@ with st.expander("⚙️ Paramètres de référence", expanded=True):
     # --- 5️⃣ Mettre à jour la session
     st.session_state["reference_table"] = edited_reference
 
+# ---------------------------
+# ACCORDÉON : Historique (vue d'ensemble nageurs × jours)
+# ---------------------------
+with st.expander("📈 Historique et vue d'ensemble", expanded=False):
+    st.markdown("Importez l'historique (CSV : `Date`, `Nom` et les colonnes de mesures) "
+                "pour ajouter une page heatmap nageurs × jours au rapport 👇")
+
+    history_file = st.file_uploader("Historique (CSV)", type=["csv"])
+    if history_file is not None:
+        history = pd.read_csv(history_file, sep=None, engine="python")
+        st.session_state["history_digest"] = hashlib.sha256(history_file.getvalue()).hexdigest()
+        if {"Date", "Nom"}.issubset(history.columns):
+            history["Date"] = pd.to_datetime(history["Date"], dayfirst=True)
+            st.session_state["history"] = history
+        else:
+            st.error("Le fichier doit contenir au moins les colonnes 'Date' et 'Nom'.")
+
+    history = st.session_state.get("history")
+    if history is not None:
+        h_min, h_max = history["Date"].min().date(), history["Date"].max().date()
+        overview_period = st.date_input("Période", value=(h_min, h_max),
+                                        min_value=h_min, max_value=h_max, format="DD/MM/YYYY")
+        # Seuls les indicateurs dont les colonnes sont dans l'historique sont proposés
+        metric_columns = {"Zone": ["% Capacité Effort", "% Régénération"]}
+        metric_columns.update({m: [m] for m in
+                               ["% Réserve", "% Régénération", "% Capacité Effort", "FC Couché", "FC Debout"]})
+        available_metrics = [m for m, cols in metric_columns.items() if set(cols).issubset(history.columns)]
+        if available_metrics:
+            overview_metric = st.selectbox("Indicateur", available_metrics)
+            include_overview = st.checkbox("Ajouter la vue d'ensemble au rapport", value=True)
+        else:
+            st.warning("Aucune colonne de mesure dans l'historique : pas de vue d'ensemble possible.")
+            include_overview = False
+    else:
+        include_overview = False
+
+# Alertes de tendance : historique + valeurs du jour, recalculées pour tout le club à chaque exécution
+trend_alerts_by_name = {}
+if st.session_state.get("history") is not None:
+    try:
+        trend_alerts_by_name = athlete_trend_alerts(
+            st.session_state["history"], st.session_state["athletes"], selected_date
+        )
+    except ValueError as e:
+        st.error(f"❌ Analyse des tendances impossible : {e}")
+for athlete in st.session_state["athletes"]:
+    athlete["Alertes tendance"] = trend_alerts_by_name.get(athlete["Nom"], [])
+    if athlete["Alertes tendance"]:
+        st.warning(f"📉 **{athlete['Nom']}** : " + " ; ".join(athlete["Alertes tendance"]))
+
+# ---------------------------
+# ACCORDÉON : Rapports individuels (un PDF par athlète)
+# ---------------------------
+with st.expander("📬 Rapports individuels", expanded=False):
+    individual_enabled = st.checkbox("Générer aussi un rapport par athlète (page de garde + sa page)")
+    delivery_mode = st.radio("Distribution", ["📁 Dossiers par athlète", "✉️ E-mail (SMTP)"], horizontal=True)
+
+    if delivery_mode == "📁 Dossiers par athlète":
+        delivery_dir = st.text_input("Dossier de dépôt", value=f"{TEMP_DIR}/individuels")
+    else:
+        c_host, c_port, c_sender = st.columns([2, 1, 2])
+        with c_host:
+            smtp_host = st.text_input("Serveur SMTP", value="localhost")
+        with c_port:
+            smtp_port = st.number_input("Port", 1, 65535, 1025)
+        with c_sender:
+            smtp_sender = st.text_input("Expéditeur", value="")
+        c_user, c_pwd, c_tls = st.columns([2, 2, 1])
+        with c_user:
+            smtp_user = st.text_input("Identifiant (optionnel)", value="")
+        with c_pwd:
+            smtp_password = st.text_input("Mot de passe", value="", type="password")
+        with c_tls:
+            smtp_starttls = st.checkbox("STARTTLS")
+
+        # Adresses e-mail par athlète, indexées par son identifiant (deux homonymes ont
+        # chacun la leur) et gardées entre deux générations
+        emails = st.session_state.setdefault("emails", {})
+        named = [a for a in st.session_state["athletes"] if a["Nom"].strip()]
+        edited_emails = st.data_editor(
+            pd.DataFrame({
+                "id": [a["id"] for a in named],
+                "Nom": [a["Nom"].strip() for a in named],
+                "E-mail": [emails.get(a["id"], "") for a in named],
+            }),
+            hide_index=True,
+            disabled=["Nom"],
+            column_config={"id": None},
+            key="emails_editor",
+        )
+        emails.update(dict(zip(edited_emails["id"], edited_emails["E-mail"].fillna(""))))
+
 st.markdown("---")
 
 # ---------------------------
@@ -245,57 +383,162 @@ if st.button("📄 Générer le rapport PDF"):
     if len(st.session_state["athletes"]) == 0:
         st.warning("⚠️ Ajoutez au moins un athlète avant de générer le rapport.")
     else:
-        with st.spinner("⏳ Génération du rapport en cours..."):
-            # 1️⃣ Charger les données nécessaires
-            report_date = selected_date
-            df_ref = st.session_state["reference_table"].set_index("Niveau")
-
-            # 2️⃣ Créer le graphique global (daily chart)
-            daily_chart_path = create_daily_chart_matplotlib(
-                df=df_athletes,
-                save_path=f"{TEMP_DIR}/daily_chart_matplotlib.png"
-            )
-
-            # 3️⃣ Créer les graphiques individuels pour chaque athlète
-            for athlete in st.session_state["athletes"]:
-                nom_safe = athlete["Nom"].replace(" ", "_") or "athlete"
-                radar_path = f"{TEMP_DIR}/radar_{nom_safe}.png"
-                tri_path = f"{TEMP_DIR}/triangle_{nom_safe}.png"
-
-                athlete["chart_left"] = create_radar_chart(
-                    athlete_data=athlete,
-                    reference_df=df_ref,
-                    save_path=radar_path
+        # 1️⃣ Charger les données nécessaires
+        report_date = selected_date
+        df_ref = st.session_state["reference_table"].set_index("Niveau")
+
+        # Rapport identique (mêmes entrées, mêmes images) déjà généré, par n'importe quelle session ?
+        report_cache = get_report_cache()
+        report_key = report_fingerprint(
+            report_date,
+            st.session_state["athletes"],
+            df_ref,
+            asset_paths=[LEFT_LOGO, RIGHT_LOGO, *LEGEND_ICONS.values()],
+            profile=pdf_profile,
+            overview=([*map(str, overview_period), overview_metric, st.session_state.get("history_digest")]
+                      if include_overview else None),
+        )
+        # Les rapports individuels (dépôt, e-mails) demandent toujours une vraie génération
+        pdf_bytes = None if individual_enabled else report_cache.get(report_key)
+
+        if pdf_bytes is not None:
+            st.success("⚡ Rapport identique déjà généré : servi depuis le cache")
+        else:
+            # Dossier propre à cette génération : deux sessions simultanées n'écrivent
+            # jamais dans les mêmes fichiers (graphiques, PDF)
+            with tempfile.TemporaryDirectory(prefix="generation_", dir=TEMP_DIR) as work_dir, \
+                    st.spinner("⏳ Génération du rapport en cours..."), \
+                    memory_probe("Rapport PDF", trace=MEMORY_TRACE) as mem:
+                # 2️⃣ Créer le graphique global (daily chart)
+                daily_chart_path = create_daily_chart_matplotlib(
+                    df=df_athletes,
+                    save_path=f"{work_dir}/daily_chart_matplotlib.png"
                 )
-                athlete["chart_right"] = create_triangle_chart(
-                    athlete_data=athlete,
-                    reference_df=df_ref,
-                    save_path=tri_path
+
+                # 3️⃣ Créer les graphiques individuels pour chaque athlète
+                for i, athlete in enumerate(st.session_state["athletes"]):
+                    radar_path = f"{work_dir}/radar_{i}.png"
+                    tri_path = f"{work_dir}/triangle_{i}.png"
+
+                    athlete["chart_left"] = create_radar_chart(
+                        athlete_data=athlete,
+                        reference_df=df_ref,
+                        save_path=radar_path
+                    )
+                    athlete["chart_right"] = create_triangle_chart(
+                        athlete_data=athlete,
+                        reference_df=df_ref,
+                        save_path=tri_path
+                    )
+
+                # 3️⃣bis Vue d'ensemble sur la période (optionnelle)
+                overview_chart_path = None
+                if include_overview and len(overview_period) == 2:
+                    try:
+                        overview_chart_path = create_period_heatmap(
+                            history_df=st.session_state["history"],
+                            metric=overview_metric,
+                            start=overview_period[0],
+                            end=overview_period[1],
+                            save_path=f"{work_dir}/period_heatmap.png"
+                        )
+                    except ValueError as e:
+                        st.error(f"❌ Vue d'ensemble impossible ({e}) : rapport généré sans cette page")
+
+                # 4️⃣ Génération du PDF final
+                pdf_path = f"{work_dir}/rapport_hrv_{report_date}.pdf"
+                build_report = (generate_hrv_report_sharded
+                                if len(st.session_state["athletes"]) >= SHARDED_MIN_ATHLETES
+                                else generate_hrv_report)
+                build_report(
+                    output_pdf_path=pdf_path,
+                    report_date=report_date,
+                    athletes=st.session_state["athletes"],
+                    left_logo_path=LEFT_LOGO,
+                    right_logo_path=RIGHT_LOGO,
+                    daily_chart_path=daily_chart_path,
+                    overview_chart_path=overview_chart_path,
+                    profile=pdf_profile,
+                    legend_icons=LEGEND_ICONS,
                 )
 
-            # 4️⃣ Génération du PDF final
-            pdf_path = f"{TEMP_DIR}/rapport_hrv_{report_date}.pdf"
-            generate_hrv_report(
-                output_pdf_path=pdf_path,
+                # 4️⃣bis Rapports individuels + distribution
+                if individual_enabled:
+                    individual_reports = generate_individual_reports(
+                        output_dir=f"{work_dir}/individuels_{report_date}",
+                        report_date=report_date,
+                        athletes=st.session_state["athletes"],
+                        left_logo_path=LEFT_LOGO,
+                        right_logo_path=RIGHT_LOGO,
+                        daily_chart_path=daily_chart_path,
+                        legend_icons=LEGEND_ICONS,
+                        profile=pdf_profile,
+                    )
+                    if delivery_mode == "📁 Dossiers par athlète":
+                        deliver_to_folders(individual_reports, delivery_dir)
+                        st.success(f"📁 {len(individual_reports)} rapports déposés dans {delivery_dir}")
+                    else:
+                        try:
+                            sent = send_reports_smtp(
+                                individual_reports,
+                                recipients=st.session_state["emails"],
+                                sender=smtp_sender,
+                                host=smtp_host,
+                                port=int(smtp_port),
+                                username=smtp_user or None,
+                                password=smtp_password or None,
+                                starttls=smtp_starttls,
+                            )
+                        except (OSError, smtplib.SMTPException) as e:
+                            st.error(f"⚠️ Envoi impossible : {e}")
+                        else:
+                            st.success(f"✉️ {len(sent['sent'])} rapports envoyés")
+                            if sent["skipped"]:
+                                st.warning(f"Sans adresse e-mail : {', '.join(sent['skipped'])}")
+                            for nom, err in sent["failed"]:
+                                st.error(f"Échec pour {nom} : {err}")
+
+                # Octets du PDF de cette génération (dossier propre) avant suppression du dossier
+                with open(pdf_path, "rb") as f:
+                    pdf_bytes = f.read()
+
+            report_cache.put(report_key, pdf_bytes)
+            st.success("✅ Rapport généré avec succès !")
+            st.caption(f"📊 {mem['seconds']:.1f} s · mémoire du serveur {mem['rss_mb']:.0f} Mo "
+                       f"({mem['rss_delta_mb']:+.1f} Mo) · figures ouvertes : {mem['open_figures']}")
+
+        # 5️⃣ Proposer le téléchargement
+        st.download_button(
+            label="📥 Télécharger le rapport HRV",
+            data=pdf_bytes,
+            file_name=f"Rapport_HRV_ASM_{report_date.strftime('%d-%m-%Y')}.pdf",
+            mime="application/pdf"
+        )
+# ---------------------------
+# BOUTON GÉNÉRATION HTML (version légère pour téléphone)
+# ---------------------------
+
+if st.button("🌐 Générer le rapport HTML (léger)"):
+    if len(st.session_state["athletes"]) == 0:
+        st.warning("⚠️ Ajoutez au moins un athlète avant de générer le rapport.")
+    else:
+        report_date = selected_date
+        with tempfile.TemporaryDirectory(prefix="generation_", dir=TEMP_DIR) as work_dir:
+            html_path = generate_hrv_report_html(
+                output_html_path=f"{work_dir}/rapport_hrv_{report_date}.html",
                 report_date=report_date,
                 athletes=st.session_state["athletes"],
-                left_logo_path="./icons/Logo_ASM_Clermont_Auvergne_2019.png",
-                right_logo_path="./icons/Elite-logo-dark.png",
-                daily_chart_path=daily_chart_path,
-                legend_icons={
-                    "menstruation": "./icons/menstruation.png",
-                    "ok": "./icons/ok.png",
-                    "vigilance": "./icons/vigilance.png",
-                    "danger": "./icons/danger.png",
-                },
+                reference_df=st.session_state["reference_table"].set_index("Niveau"),
+                left_logo_path=LEFT_LOGO,
+                right_logo_path=RIGHT_LOGO,
+                legend_icons=LEGEND_ICONS,
             )
-
-        # 5️⃣ Proposer le téléchargement
-        with open(pdf_path, "rb") as f:
-            st.success("✅ Rapport généré avec succès !")
-            st.download_button(
-                label="📥 Télécharger le rapport HRV",
-                data=f,
-                file_name=f"Rapport_HRV_ASM_{report_date.strftime('%d-%m-%Y')}.pdf",
-                mime="application/pdf"
-            )
\ No newline at end of file
+            with open(html_path, "rb") as f:
+                html_bytes = f.read()
+        st.success("✅ Rapport HTML généré avec succès !")
+        st.download_button(
+            label="📥 Télécharger le rapport HTML",
+            data=html_bytes,
+            file_name=f"Rapport_HRV_ASM_{report_date.strftime('%d-%m-%Y')}.html",
+            mime="text/html"
+        )
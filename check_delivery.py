@@ -0,0 +1,103 @@
+"""
+Contrôle de l'envoi des rapports individuels par e-mail : un serveur SMTP minimal
+tourne dans ce processus et compte les connexions. Tout le lot doit partir sur une
+seule connexion, et chaque athlète (homonymes compris) reçoit son propre rapport.
+
+    python check_delivery.py --reports 40
+"""
+import argparse
+import socketserver
+import sys
+import tempfile
+import threading
+from collections import Counter
+from datetime import date
+
+import numpy as np
+
+from hrv_delivery import send_reports_smtp
+from hrv_pdf import generate_individual_reports
+from soak_test import LEGEND_ICONS, random_athletes
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Serveur SMTP de test : accepte tous les messages et note connexions et destinataires."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPStubHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.recipients = Counter()
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.reply("220 stub ESMTP")
+        rcpt = []
+        for raw in self.rfile:
+            command = raw.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-stub")
+                self.reply("250 8BITMIME")
+            elif verb == "RCPT":
+                rcpt.append(command.split(":", 1)[1].strip(" <>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 Fin par <CRLF>.<CRLF>")
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                with self.server.lock:
+                    self.server.recipients.update(rcpt)
+                rcpt = []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:  # HELO, MAIL, RSET, NOOP
+                self.reply("250 OK")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    athletes = random_athletes(np.random.default_rng(0), args.reports)
+    athletes[1]["Nom"] = athletes[0]["Nom"]  # deux homonymes
+    for i, a in enumerate(athletes):
+        a["id"] = f"athlete-{i}"
+    recipients = {a["id"]: f"nageur{i}@club.test" for i, a in enumerate(athletes)}
+
+    server = SMTPStub()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            reports = generate_individual_reports(work_dir, date(2025, 5, 1), athletes,
+                                                  legend_icons=LEGEND_ICONS, workers=1)
+            result = send_reports_smtp(reports, recipients, sender="coach@club.test",
+                                       host="127.0.0.1", port=server.server_address[1])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"Connexions SMTP : {server.connections} ; messages reçus : {sum(server.recipients.values())}")
+    if server.connections > 1:
+        print(f"❌ {args.reports} rapports envoyés sur {server.connections} connexions (attendu : 1)")
+        return 1
+    if result["failed"] or result["skipped"]:
+        print(f"❌ Envois en échec : {result['failed']} ; sans adresse : {result['skipped']}")
+        return 1
+    if server.recipients != Counter(recipients.values()):
+        print("❌ Chaque adresse doit recevoir exactement un rapport (homonymes compris)")
+        return 1
+    print("✅ Un seul envoi par athlète, sur une seule connexion")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
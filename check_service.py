@@ -0,0 +1,88 @@
+"""
+Contrôle de la validation du service de rapports : chaque requête invalide doit
+recevoir un 400 sans occuper un processus de rendu, et une requête valide un PDF.
+
+    python check_service.py
+"""
+import copy
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+
+from hrv_service import ReportBatcher, make_handler
+from soak_test import REFERENCE, random_athletes
+
+def invalid_payloads(valid):
+    """(description, requête invalide) dérivées de la requête valide."""
+    def variant(change):
+        payload = copy.deepcopy(valid)
+        change(payload)
+        return payload
+
+    yield "date non textuelle", variant(lambda p: p.update(date=20250501))
+    yield "profil inconnu", variant(lambda p: p.update(profile="poster"))
+    yield "aucun athlète", variant(lambda p: p.update(athletes=[]))
+    yield "valeur athlète manquante", variant(lambda p: p["athletes"][0].pop("FC Debout"))
+    yield "valeur athlète NaN", variant(lambda p: p["athletes"][0].update({"% Réserve": float("nan")}))
+    yield "valeur athlète infinie", variant(lambda p: p["athletes"][0].update({"FC Couché": float("inf")}))
+    yield "Recommandations non textuelles", variant(lambda p: p["athletes"][0].update(Recommandations=3))
+    yield "Commentaires non textuels", variant(lambda p: p["athletes"][0].update(Commentaires=["a"]))
+    yield "référence vide", variant(lambda p: p.update(reference=[]))
+    yield "référence sans mesures", variant(lambda p: p.update(reference=[{"Niveau": "Moyenne"}]))
+    yield "référence NaN", variant(lambda p: p["reference"][0].update({"FC Debout": float("nan")}))
+    yield "référence sans Niveau", variant(lambda p: p["reference"][0].pop("Niveau"))
+
+def post(url, payload):
+    body = json.dumps(payload).encode("utf-8")  # NaN / Infinity acceptés par json.loads
+    request = urllib.request.Request(url, body, {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def main():
+    valid = {
+        "date": "2025-05-01",
+        "athletes": random_athletes(np.random.default_rng(0), 2),
+        "reference": REFERENCE.reset_index().to_dict("records"),
+        "profile": "screen",
+    }
+
+    batcher = ReportBatcher(workers=1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(batcher))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    failures = []
+    try:
+        for label, payload in invalid_payloads(valid):
+            status, body = post(f"{base_url}/report", payload)
+            print(f"{status} {label} : {json.loads(body).get('error') if status == 400 else body[:80]}")
+            if status != 400:
+                failures.append(label)
+        renders_after_invalid = batcher.metrics()["renders"]
+        status, body = post(f"{base_url}/report", valid)
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.pool.shutdown(cancel_futures=True)
+
+    if failures:
+        print(f"❌ Requêtes invalides sans réponse 400 : {failures}")
+        return 1
+    if renders_after_invalid:
+        print(f"❌ {renders_after_invalid} rendu(s) lancé(s) pour des requêtes invalides")
+        return 1
+    if status != 200 or not body.startswith(b"%PDF"):
+        print(f"❌ Requête valide refusée : {status} {body[:200]!r}")
+        return 1
+    print("✅ Requêtes invalides refusées (400) sans rendu, requête valide servie")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
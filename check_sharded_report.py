@@ -0,0 +1,64 @@
+"""
+Contrôle de la fusion des rapports en parallèle : le même rapport est généré
+par generate_hrv_report et par generate_hrv_report_sharded, qui doivent contenir
+le même nombre d'images (logos, icônes et graphique quotidien gardés une seule fois).
+
+    python check_sharded_report.py --athletes 40 --workers 4 --profile archive
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from matplotlib_chart import create_daily_chart_matplotlib, create_radar_chart, create_triangle_chart
+from hrv_pdf import generate_hrv_report, generate_hrv_report_sharded, image_xobject_count
+from soak_test import LEGEND_ICONS, REFERENCE, random_athletes
+
+LEFT_LOGO = "./icons/Logo_ASM_Clermont_Auvergne_2019.png"
+RIGHT_LOGO = "./icons/Elite-logo-dark.png"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--athletes", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--profile", default="archive", choices=["screen", "print", "archive"])
+    parser.add_argument("--max-size-ratio", type=float, default=1.05,
+                        help="taille max du PDF fusionné par rapport au PDF séquentiel")
+    args = parser.parse_args(argv)
+
+    report_date = date(2025, 5, 1)
+    athletes = random_athletes(np.random.default_rng(0), args.athletes)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        daily = create_daily_chart_matplotlib(pd.DataFrame(athletes), save_path=f"{work_dir}/daily.png")
+        for i, a in enumerate(athletes):
+            a["chart_left"] = create_radar_chart(a, REFERENCE, f"{work_dir}/radar_{i}.png")
+            a["chart_right"] = create_triangle_chart(a, REFERENCE, f"{work_dir}/triangle_{i}.png")
+
+        assets = dict(left_logo_path=LEFT_LOGO, right_logo_path=RIGHT_LOGO, daily_chart_path=daily,
+                      legend_icons=LEGEND_ICONS, profile=args.profile)
+        sequential = f"{work_dir}/sequentiel.pdf"
+        sharded = f"{work_dir}/parallele.pdf"
+        generate_hrv_report(sequential, report_date, athletes, **assets)
+        generate_hrv_report_sharded(sharded, report_date, athletes, workers=args.workers, shard_size=5, **assets)
+
+        counts = image_xobject_count(sequential), image_xobject_count(sharded)
+        sizes = os.path.getsize(sequential), os.path.getsize(sharded)
+
+    print(f"Images : {counts[0]} (séquentiel) / {counts[1]} (parallèle) ; "
+          f"taille : {sizes[0] / 2**20:.2f} Mo / {sizes[1] / 2**20:.2f} Mo")
+    if counts[1] != counts[0]:
+        print("❌ Le PDF fusionné contient des images en double")
+        return 1
+    if sizes[1] > sizes[0] * args.max_size_ratio:
+        print(f"❌ PDF fusionné plus lourd que {args.max_size_ratio:.2f} × le PDF séquentiel")
+        return 1
+    print("✅ Fusion sans doublons")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
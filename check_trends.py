@@ -0,0 +1,76 @@
+"""
+Contrôle des seuils de hrv_trends : sur un historique de bruit pur, les alertes
+doivent rester rares ; une vraie hausse progressive de la FC couché doit être signalée.
+
+    python check_trends.py --athletes 50 --days 60 --seeds 5
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from hrv_trends import compute_trend_flags, trend_alerts
+
+# Moyenne et écart-type journaliers de chaque indicateur
+NOISE = {
+    "% Réserve": (100, 20),
+    "% Régénération": (100, 20),
+    "% Capacité Effort": (100, 20),
+    "FC Couché": (58, 3),
+    "FC Debout": (85, 5),
+}
+
+def noise_history(rng, athletes, days):
+    dates = pd.date_range("2025-01-01", periods=days)
+    history = pd.DataFrame({
+        "Date": np.tile(dates, athletes),
+        "Nom": np.repeat([f"Nageur {i + 1}" for i in range(athletes)], days),
+    })
+    for metric, (mean, std) in NOISE.items():
+        history[metric] = rng.normal(mean, std, len(history)).round()
+    return history
+
+def add_resting_hr_ramp(history, nom, days=7, bpm_per_day=1.5):
+    """FC couché qui monte de `bpm_per_day` par jour sur les `days` derniers jours."""
+    history = history.copy()
+    start = history["Date"].max() - pd.Timedelta(days=days)
+    ramp = (history["Nom"] == nom) & (history["Date"] > start)
+    history.loc[ramp, "FC Couché"] = NOISE["FC Couché"][0] + (history.loc[ramp, "Date"] - start).dt.days * bpm_per_day
+    return history
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--athletes", type=int, default=50)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--max-alert-rate", type=float, default=0.02,
+                        help="part max de nageurs en alerte par jour sur du bruit pur")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for seed in range(args.seeds):
+        history = noise_history(np.random.default_rng(seed), args.athletes, args.days)
+
+        # Bruit pur : part des nageurs en alerte, jour par jour, une fois la référence établie
+        flags = compute_trend_flags(history)
+        flags = flags[flags["Date"] >= flags["Date"].min() + pd.Timedelta(days=30)]
+        alerting = flags[flags["Pic"] | flags["Dérive lente"] | flags["Changement"]]
+        rate = alerting.groupby("Date")["Nom"].nunique().sum() / (flags["Date"].nunique() * args.athletes)
+
+        # Hausse progressive de la FC couché d'un nageur
+        alerts = trend_alerts(compute_trend_flags(add_resting_hr_ramp(history, "Nageur 1")))
+        ramp_found = any(msg.startswith("FC Couché") for msg in alerts.get("Nageur 1", []))
+
+        print(f"graine {seed} : {rate:.1%} de nageurs en alerte par jour (bruit), "
+              f"hausse FC couché {'signalée' if ramp_found else 'NON signalée'}")
+        failed |= rate > args.max_alert_rate or not ramp_found
+
+    if failed:
+        print("❌ Seuils de tendance à revoir")
+        return 1
+    print("✅ Bruit silencieux, hausse de FC couché détectée")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from hrv_pdf import ATHLETE_CARDS
+
+# ---------- Cache des rapports terminés (octets du PDF) ----------
+
+# Clés propres à une génération (chemins de fichiers temporaires, identifiant d'interface)
+VOLATILE_ATHLETE_KEYS = {"id", "chart_left", "chart_right"}
+
+def asset_versions(paths) -> list:
+    """(chemin, date de modification, taille) de chaque image : un logo remplacé change l'empreinte."""
+    versions = []
+    for path in sorted(set(p for p in paths if p)):
+        try:
+            stat = os.stat(path)
+            versions.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            versions.append((path, None, None))
+    return versions
+
+def report_fingerprint(report_date, athletes, reference_df, asset_paths=(), **options) -> str:
+    """
+    Empreinte SHA-256 de tout ce qui détermine le rapport : date, athlètes (dans l'ordre
+    des pages), table de référence, versions des images et options (profil, vue d'ensemble...).
+    Deux demandes de même empreinte produisent le même PDF.
+    """
+    content = {
+        "date": str(report_date),
+        "athletes": [{k: v for k, v in a.items() if k not in VOLATILE_ATHLETE_KEYS} for a in athletes],
+        "reference": reference_df.to_csv(),
+        "assets": asset_versions(list(asset_paths) + [card[1] for card in ATHLETE_CARDS]),
+        "options": options,
+    }
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ReportCache:
+    """
+    Cache LRU borné (nombre d'entrées et taille totale) des rapports déjà générés,
+    partagé entre les sessions / threads du serveur. Les plus anciens sont évincés.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return  # trop gros pour être gardé
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_mb": round(self._size / 2**20, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
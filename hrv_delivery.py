@@ -0,0 +1,102 @@
+import os
+import shutil
+import smtplib
+from email.message import EmailMessage
+
+from hrv_pdf import safe_file_stem
+
+# ---------- Envoi des rapports individuels ----------
+
+def deliver_to_folders(reports: dict, base_dir: str) -> dict:
+    """
+    Dépose chaque rapport ({clé: (Nom, chemin)}, cf. generate_individual_reports)
+    dans un dossier par athlète : base_dir/<Nom>/<fichier>.pdf
+    Retourne {clé: chemin déposé}.
+    """
+    delivered = {}
+    for key, (nom, pdf_path) in reports.items():
+        athlete_dir = os.path.join(base_dir, safe_file_stem(nom))
+        os.makedirs(athlete_dir, exist_ok=True)
+        delivered[key] = shutil.copy2(pdf_path, athlete_dir)
+
+    print(f"✅ {len(delivered)} rapports déposés dans : {base_dir}")
+    return delivered
+
+def _build_message(sender, recipient, subject, body, pdf_path):
+    msg = EmailMessage()
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    msg.set_content(body)
+    with open(pdf_path, "rb") as f:
+        msg.add_attachment(f.read(), maintype="application", subtype="pdf",
+                           filename=os.path.basename(pdf_path))
+    return msg
+
+def _connect(host, port, username, password, starttls, timeout):
+    smtp = smtplib.SMTP(host, port, timeout=timeout)
+    if starttls:
+        smtp.starttls()
+    if username:
+        smtp.login(username, password or "")
+    return smtp
+
+def send_reports_smtp(
+    reports: dict,
+    recipients: dict,
+    sender: str,
+    subject: str = "Rapport HRV ASM Natation",
+    body: str = "Bonjour,\n\nVeuillez trouver ci-joint votre rapport HRV du jour.\n\nASM Natation",
+    host: str = "localhost",
+    port: int = 25,
+    username=None,
+    password=None,
+    starttls=False,
+    timeout=30,
+) -> dict:
+    """
+    Envoie chaque rapport ({clé: (Nom, chemin)}, cf. generate_individual_reports)
+    à l'adresse de son athlète ({clé: e-mail}, même clé que le rapport : deux homonymes
+    ont chacun la leur) en réutilisant une seule connexion SMTP pour tout le lot
+    (reconnexion si le serveur coupe).
+    Fonctionne avec un serveur SMTP local de test (ex: `python -m aiosmtpd -n -l localhost:1025`).
+
+    Retourne {"sent": [Nom...], "skipped": [Nom...], "failed": [(Nom, erreur)...]}.
+    """
+    result = {"sent": [], "skipped": [], "failed": []}
+    smtp = None
+    try:
+        for key, (nom, pdf_path) in reports.items():
+            nom = nom.strip() or "(sans nom)"
+            recipient = (recipients.get(key) or "").strip()
+            if not recipient:
+                result["skipped"].append(nom)
+                continue
+
+            msg = _build_message(sender, recipient, subject, body, pdf_path)
+            for attempt in range(2):
+                # Une erreur de connexion ou d'authentification arrête tout le lot
+                if smtp is None:
+                    smtp = _connect(host, port, username, password, starttls, timeout)
+                try:
+                    smtp.send_message(msg)
+                    result["sent"].append(nom)
+                    break
+                except smtplib.SMTPServerDisconnected as e:
+                    # Le serveur a fermé la connexion : on en rouvre une et on réessaie une fois
+                    smtp = None
+                    if attempt == 1:
+                        result["failed"].append((nom, str(e)))
+                except smtplib.SMTPException as e:
+                    result["failed"].append((nom, str(e)))
+                    break
+    finally:
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except smtplib.SMTPException:
+                smtp.close()
+
+    print(f"✅ {len(result['sent'])} rapports envoyés, {len(result['skipped'])} sans adresse, "
+          f"{len(result['failed'])} en échec")
+    return result
@@ -0,0 +1,249 @@
+import base64
+import math
+import os
+from datetime import date
+from html import escape
+
+import pandas as pd
+
+from hrv_pdf import (
+    ATHLETE_CARDS, MENSTRUATION_MESSAGE, STATUS_LEVELS,
+    athlete_status, format_card_value, format_date_fr, prepare_image,
+)
+from matplotlib_chart import DAILY_ZONES, select_mean_row
+
+# ---------- Rapport HTML (alternative légère au PDF, lisible sur téléphone) ----------
+
+# Palette "Set1" de matplotlib, comme le graphique quotidien
+SET1 = ["#e41a1c", "#377eb8", "#4daf4a", "#984ea3", "#ff7f00", "#ffff33", "#a65628", "#f781bf", "#999999"]
+ATHLETE_COLOR = "#C40B71"
+
+RADAR_CATEGORIES = ['% Capacité Effort', '% Réserve', '% Régénération', 'FC Couché', 'FC Debout']
+TRIANGLE_CATEGORIES = ['% Capacité Effort', '% Réserve', '% Régénération']
+
+# Anneaux de seuils du radar : (niveau bas, niveau haut, couleur, opacité) ; None = centre / 200
+RADAR_LEVELS = [
+    (None, "DANGER", "red", 0.2),
+    ("DANGER", "VIGILANCE", "orange", 0.2),
+    ("VIGILANCE", "CORRECT", "lightblue", 0.2),
+    ("CORRECT", "OK", "lightgreen", 0.2),
+    ("OK", None, "green", 0.15),
+]
+
+CSS = """
+body { font-family: Helvetica, Arial, sans-serif; margin: 0; background: #fff; color: #000; }
+main { max-width: 860px; margin: 0 auto; padding: 12px; }
+header { display: flex; align-items: center; justify-content: space-between; gap: 8px; }
+header div { text-align: center; }
+h1 { font-size: 1.2rem; margin: 0; }
+h2 { font-size: 1.1rem; margin: 0 0 2px; }
+.date { font-size: 0.85rem; color: #333; }
+section { border-top: 1px solid #999; padding: 16px 0; }
+svg { width: 100%; height: auto; display: block; }
+.legend { display: flex; flex-wrap: wrap; gap: 6px 16px; font-size: 0.85rem; }
+.legend span { display: inline-flex; align-items: center; gap: 6px; }
+.alert .ico { margin-right: 4px; }
+.dot { width: 12px; height: 12px; border-radius: 50%; display: inline-block; border: 1px solid #000; }
+.cards { display: grid; grid-template-columns: repeat(3, 1fr); gap: 8px; margin: 12px 0; }
+.card { background: #f7f7f7; border-radius: 10px; padding: 8px 10px; position: relative; min-height: 52px; }
+.card b { font-size: 0.8rem; }
+.card .ico { position: absolute; top: 6px; right: 6px; }
+.card div { text-align: center; font-weight: bold; font-size: 1.1rem; margin-top: 8px; }
+.charts { display: grid; grid-template-columns: 1fr 1fr; gap: 8px; }
+.reco { background: #f7f7f7; border: 1px solid #000; border-radius: 12px; display: flex; gap: 12px; padding: 10px; margin-top: 12px; }
+.reco .status { min-width: 96px; text-align: center; border-right: 1px solid #999; padding-right: 10px; }
+.reco .comments { white-space: pre-wrap; font-size: 0.95rem; }
+.alert { color: red; font-weight: bold; text-align: center; margin-top: 6px; }
+.trend { color: #e67e00; font-weight: bold; font-size: 0.85em; margin: 4px 0 8px; }
+@media (max-width: 560px) { .cards { grid-template-columns: 1fr 1fr; } .charts { grid-template-columns: 1fr; } }
+"""
+
+def image_data_uri(path, w, h, profile="screen") -> str:
+    """Image intégrée au HTML (data URI), réduite par prepare_image comme pour le PDF."""
+    if not path or not os.path.exists(path):
+        return ""
+    prepared = prepare_image(path, w, h, profile)
+    mime = "image/jpeg" if prepared.lower().endswith((".jpg", ".jpeg")) else "image/png"
+    with open(prepared, "rb") as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+class _IconSheet:
+    """
+    Icônes intégrées une seule fois dans la feuille de style (une classe CSS par
+    image et par taille), puis référencées autant de fois que nécessaire.
+    """
+
+    def __init__(self):
+        self.classes = {}
+        self.rules = []
+
+    def __call__(self, path, w, h) -> str:
+        key = (path, w, h)
+        if key not in self.classes:
+            uri = image_data_uri(path, w, h)
+            if not uri:
+                return ""
+            self.classes[key] = f"i{len(self.classes)}"
+            self.rules.append(f'.{self.classes[key]}{{width:{w}px;height:{h}px;'
+                              f'background:url("{uri}") center/contain no-repeat}}')
+        return f'<i class="ico {self.classes[key]}"></i>'
+
+    def css(self) -> str:
+        return ".ico{display:inline-block;vertical-align:middle}" + "".join(self.rules)
+
+# ---------- Graphiques SVG ----------
+
+def svg_daily_chart(athletes: list, size=420) -> str:
+    """Régénération (y) vs capacité d'effort (x), mêmes zones que create_daily_chart_matplotlib."""
+    pad_l, pad_b, pad_t = 36, 30, 8
+    plot = size - pad_l - 8
+    sx = lambda v: pad_l + min(max(float(v), 0), 200) / 200 * plot
+    sy = lambda v: pad_t + plot - min(max(float(v), 0), 200) / 200 * plot
+
+    parts = [f'<svg viewBox="0 0 {size} {plot + pad_t + pad_b}" xmlns="http://www.w3.org/2000/svg" '
+             f'font-family="Helvetica, Arial, sans-serif">']
+    for x0, x1, y0, y1, color, alpha in DAILY_ZONES:
+        parts.append(f'<rect x="{sx(x0):.1f}" y="{sy(y1):.1f}" width="{sx(x1) - sx(x0):.1f}" '
+                     f'height="{sy(y0) - sy(y1):.1f}" fill="{color}" fill-opacity="{alpha}"/>')
+    for v in range(0, 201, 25):
+        parts.append(f'<line x1="{sx(v):.1f}" y1="{sy(0):.1f}" x2="{sx(v):.1f}" y2="{sy(200):.1f}" stroke="#000" stroke-opacity="0.1"/>')
+        parts.append(f'<line x1="{sx(0):.1f}" y1="{sy(v):.1f}" x2="{sx(200):.1f}" y2="{sy(v):.1f}" stroke="#000" stroke-opacity="0.1"/>')
+        parts.append(f'<text x="{sx(v):.1f}" y="{sy(0) + 12:.1f}" font-size="9" text-anchor="middle">{v}</text>')
+        parts.append(f'<text x="{sx(0) - 4:.1f}" y="{sy(v) + 3:.1f}" font-size="9" text-anchor="end">{v}</text>')
+    parts.append(f'<rect x="{sx(0)}" y="{sy(200)}" width="{plot}" height="{plot}" fill="none" stroke="#000"/>')
+    parts.append(f'<text x="{sx(100):.1f}" y="{sy(0) + 26:.1f}" font-size="10" text-anchor="middle">% Capacité d’effort</text>')
+    parts.append(f'<text transform="translate(10 {sy(100):.1f}) rotate(-90)" font-size="10" text-anchor="middle">% Régénération</text>')
+
+    for i, a in enumerate(athletes):
+        x, y = sx(a.get("% Capacité Effort", 0)), sy(a.get("% Régénération", 0))
+        parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="9" fill="{SET1[i % len(SET1)]}" fill-opacity="0.85" stroke="#000">'
+                     f'<title>{escape(a.get("Nom", "Athlète"))}</title></circle>')
+        parts.append(f'<text x="{x:.1f}" y="{y + 3:.1f}" font-size="7" font-weight="bold" text-anchor="middle">'
+                     f'{format_card_value(a.get("% Réserve", 0))}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+def _polar_points(values, size, radius):
+    """Polygone (chaîne de points SVG) : premier axe en haut, sens horaire, échelle 0-200."""
+    n = len(values)
+    pts = []
+    for k, v in enumerate(values):
+        r = min(max(float(v), 0), 200) / 200 * radius
+        theta = 2 * math.pi * k / n
+        pts.append(f"{size / 2 + r * math.sin(theta):.1f},{size / 2 - r * math.cos(theta):.1f}")
+    return " ".join(pts)
+
+def svg_polar_chart(athlete: dict, reference_df: pd.DataFrame, categories: list, with_levels=True, size=300) -> str:
+    """Radar (5 axes) ou triangle (3 axes) : athlète, sa ligne moyenne et, pour le radar, les seuils."""
+    radius = size / 2 - 48
+    nom = athlete.get("Nom", "Athlète")
+    mean_row = select_mean_row(reference_df, nom)
+    n = len(categories)
+
+    parts = [f'<svg viewBox="0 0 {size} {size}" xmlns="http://www.w3.org/2000/svg" font-family="Helvetica, Arial, sans-serif">']
+
+    # === Zones colorées selon les seuils (anneaux entre deux niveaux)
+    if with_levels and all(level in reference_df.index for level in ("DANGER", "VIGILANCE", "CORRECT", "OK")):
+        for low, high, color, alpha in RADAR_LEVELS:
+            outer = _polar_points(reference_df.loc[high, categories] if high else [200] * n, size, radius)
+            inner = f' M{_polar_points(reference_df.loc[low, categories], size, radius)} Z' if low else ""
+            parts.append(f'<path d="M{outer} Z{inner}" fill="{color}" fill-opacity="{alpha}" fill-rule="evenodd"/>')
+
+    # === Axes de fond
+    for r in range(25, 201, 25):
+        parts.append(f'<polygon points="{_polar_points([r] * n, size, radius)}" fill="none" stroke="gray" '
+                     f'stroke-width="0.3" stroke-dasharray="1 2"/>')
+    for k, cat in enumerate(categories):
+        theta = 2 * math.pi * k / n
+        x, y = size / 2 + radius * math.sin(theta), size / 2 - radius * math.cos(theta)
+        lx, ly = size / 2 + (radius + 22) * math.sin(theta), size / 2 - (radius + 16) * math.cos(theta)
+        parts.append(f'<line x1="{size / 2}" y1="{size / 2}" x2="{x:.1f}" y2="{y:.1f}" stroke="gray" stroke-opacity="0.6" stroke-width="0.8"/>')
+        parts.append(f'<text x="{lx:.1f}" y="{ly + 3:.1f}" font-size="9" font-weight="bold" text-anchor="middle">{escape(cat)}</text>')
+
+    # === Moyenne (gris pointillé) puis athlète
+    parts.append(f'<polygon points="{_polar_points(mean_row[categories], size, radius)}" fill="gray" fill-opacity="0.1" '
+                 f'stroke="gray" stroke-width="1.8" stroke-dasharray="5 3"><title>{escape(nom)} Moyenne</title></polygon>')
+    parts.append(f'<polygon points="{_polar_points([athlete.get(c, 0) for c in categories], size, radius)}" '
+                 f'fill="{ATHLETE_COLOR}" fill-opacity="0.25" stroke="{ATHLETE_COLOR}" stroke-width="2.2">'
+                 f'<title>{escape(nom)}</title></polygon>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+# ---------- Génération du rapport ----------
+
+def _athlete_section(a, report_date, reference_df, legend_icons, icon) -> str:
+    nom = a.get("Nom", "Athlète")
+    cards = "".join(
+        f'<div class="card"><b>{escape(title)}</b>{icon(icon_path, 22, 22)}'
+        f'<div>{escape(format_card_value(a.get(title, 0), suffix))}</div></div>'
+        for title, icon_path, suffix, _, _ in sorted(ATHLETE_CARDS, key=lambda card: (card[4], card[3]))
+    )
+    statut = athlete_status(a)
+    label_statut, _ = STATUS_LEVELS[statut]
+    menstruation = ""
+    if a.get("Menstruation", False):
+        menstruation_icon = legend_icons.get("menstruation", "./icons/menstruation.png")
+        menstruation = f'<div class="alert">{icon(menstruation_icon, 16, 16)}{escape(MENSTRUATION_MESSAGE)}</div>'
+    trends = "".join(
+        f'<div class="trend">Tendance - {escape(line)}</div>' for line in (a.get("Alertes tendance") or [])
+    )
+
+    return (
+        f'<section><h2>Rapport Individuel de {escape(nom)}</h2>'
+        f'<div class="date">{format_date_fr(report_date)}</div>'
+        f'<div class="cards">{cards}</div>{trends}'
+        f'<div class="charts">{svg_polar_chart(a, reference_df, RADAR_CATEGORIES)}'
+        f'{svg_polar_chart(a, reference_df, TRIANGLE_CATEGORIES, with_levels=False)}</div>'
+        f'<div class="reco"><div class="status"><b>Recommandations</b><br>{icon(legend_icons.get(statut), 40, 40)}'
+        f'<br><b>{label_statut}</b></div>'
+        f'<div class="comments">{escape((a.get("Commentaires") or "").strip())}</div></div>'
+        f'{menstruation}</section>'
+    )
+
+def generate_hrv_report_html(
+    output_html_path: str,
+    report_date: date,
+    athletes: list,
+    reference_df: pd.DataFrame,
+    left_logo_path=None,
+    right_logo_path=None,
+    legend_icons=None,
+):
+    """
+    Rapport HTML autonome (un seul fichier, graphiques SVG et icônes intégrés) :
+    même contenu que generate_hrv_report, sans rendu matplotlib ni reportlab.
+    """
+    if legend_icons is None:
+        legend_icons = {}
+    os.makedirs(os.path.dirname(output_html_path), exist_ok=True)
+    icon = _IconSheet()
+
+    legend_items = "".join(
+        f'<span><i class="dot" style="background:{SET1[i % len(SET1)]}"></i>{escape(a.get("Nom", "Athlète"))}</span>'
+        for i, a in enumerate(athletes)
+    )
+    status_legend = "".join(
+        f'<span>{icon(legend_icons.get(key), 16, 16)}{label}</span>'
+        for key, label in [("menstruation", "Cycle menstruel")] + [(k, v[0]) for k, v in STATUS_LEVELS.items()]
+    )
+
+    header = (
+        f'<header>{icon(left_logo_path, 64, 64)}<div><h1>Rapport ASM Natation<br>Variabilité Fréquence Cardiaque</h1>'
+        f'<div class="date">{format_date_fr(report_date)}</div></div>{icon(right_logo_path, 64, 64)}</header>'
+        f'<section><h2>Évolution quotidienne : Régénération vs Capacité d’effort</h2>{svg_daily_chart(athletes)}'
+        f'<div class="legend">{legend_items}</div></section>'
+        f'<section><div class="legend"><b>Légende :</b>{status_legend}</div></section>'
+    )
+    pages = "".join(_athlete_section(a, report_date, reference_df, legend_icons, icon) for a in athletes)
+
+    html = (
+        '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f'<title>Rapport HRV ASM Natation – {format_date_fr(report_date)}</title>'
+        f'<style>{CSS}{icon.css()}</style></head><body><main>{header}{pages}</main></body></html>'
+    )
+
+    with open(output_html_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    print(f"✅ Rapport HTML sauvegardé : {output_html_path}")
+    return output_html_path
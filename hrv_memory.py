@@ -0,0 +1,106 @@
+import gc
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+# ---------- Mesure mémoire (processus Streamlit longue durée) ----------
+
+def current_rss_bytes() -> int:
+    """
+    Mémoire résidente actuelle du processus (RSS).
+    Linux : /proc/self/statm ; ailleurs : pic RSS (resource) à défaut de mieux.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+# Figures matplotlib autonomes encore en mémoire (références faibles : le suivi ne les
+# retient pas). Les fonds du graphique quotidien, gardés volontairement, sont comptés à part.
+_LIVE_FIGURES = weakref.WeakSet()
+_CACHED_FIGURES = weakref.WeakSet()
+
+def track_figure(fig, cached=False):
+    """Enregistre une figure pour open_figures_count (ou cached_figures_count) et la renvoie."""
+    (_CACHED_FIGURES if cached else _LIVE_FIGURES).add(fig)
+    return fig
+
+def open_figures_count() -> int:
+    """Figures suivies encore en mémoire après un ramasse-miettes (doit rester à 0 entre deux rapports)."""
+    gc.collect()
+    return len(_LIVE_FIGURES)
+
+def cached_figures_count() -> int:
+    """Fonds du graphique quotidien gardés en cache (un par taille et par session simultanée)."""
+    return len(_CACHED_FIGURES)
+
+# tracemalloc est global au processus : compteur des mesures en cours (threads Streamlit)
+# pour qu'une mesure qui se termine n'arrête pas le traçage d'une autre
+_TRACE_LOCK = threading.Lock()
+_trace_users = 0
+_trace_started_here = False
+
+def _acquire_trace():
+    global _trace_users, _trace_started_here
+    with _TRACE_LOCK:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_started_here = True
+        _trace_users += 1
+
+def _release_trace():
+    global _trace_users, _trace_started_here
+    with _TRACE_LOCK:
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_started_here:
+            tracemalloc.stop()
+            _trace_started_here = False
+
+@contextmanager
+def memory_probe(label: str, trace=False):
+    """
+    Mesure un bloc (ex: génération d'un rapport) : durée, RSS avant/après
+    et figures restées ouvertes.
+    trace=True ajoute les allocations Python (tracemalloc) : plusieurs fois plus lent,
+    à réserver au diagnostic (soak_test.py --trace, HRV_MEMORY_TRACE=1 pour app.py).
+    Les valeurs Python sont globales au processus : elles incluent les autres threads.
+    Le dictionnaire renvoyé est rempli à la sortie du bloc.
+    """
+    stats = {"label": label}
+    if trace:
+        _acquire_trace()
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+
+    rss_before = current_rss_bytes()
+    t0 = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats["seconds"] = time.perf_counter() - t0
+        stats["rss_mb"] = current_rss_bytes() / 2**20
+        stats["rss_delta_mb"] = stats["rss_mb"] - rss_before / 2**20
+        if trace:
+            traced_after, traced_peak = tracemalloc.get_traced_memory()
+            stats["python_delta_mb"] = (traced_after - traced_before) / 2**20
+            stats["python_peak_mb"] = (traced_peak - traced_before) / 2**20
+            _release_trace()
+        stats["open_figures"] = open_figures_count()
+        stats["cached_figures"] = cached_figures_count()
+
+        print(
+            f"📊 {label} : {stats['seconds']:.2f} s, RSS {stats['rss_mb']:.0f} Mo "
+            f"({stats['rss_delta_mb']:+.1f} Mo)"
+            + (f", Python {stats['python_delta_mb']:+.1f} Mo (pic {stats['python_peak_mb']:.1f} Mo)" if trace else "")
+            + f", figures ouvertes : {stats['open_figures']} (fonds en cache : {stats['cached_figures']})"
+        )
@@ -1,10 +1,208 @@
+from reportlab import rl_config
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
+from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import cm
 from reportlab.lib.colors import Color, black, white, red, green, orange, gray
 from reportlab.lib.utils import ImageReader
 from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+import hashlib
+import io
+import math
+import multiprocessing
 import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Flux binaires (pas d'encodage ASCII85, +25 % sur chaque image et chaque page)
+rl_config.useA85 = 0
+
+# ---------- Profils de sortie ----------
+
+# image_dpi     : résolution max des images à leur taille affichée (None = originale)
+# jpeg_quality  : recompression JPEG des images opaques (None = PNG sans perte)
+# icon_colors   : palette max des images avec transparence (None = couleurs d'origine)
+PDF_PROFILES = {
+    "screen": {"page_compression": 1, "image_dpi": 150, "jpeg_quality": 80, "icon_colors": 64},
+    "print": {"page_compression": 1, "image_dpi": 220, "jpeg_quality": 92, "icon_colors": 256},
+    "archive": {"page_compression": 1, "image_dpi": None, "jpeg_quality": None, "icon_colors": None},
+}
+
+# Dossier des images préparées (réutilisées tant que le contenu de la source est le même)
+PREPARED_IMAGES_DIR = "./temp_chart/pdf_images"
+# Nombre max d'entrées gardées en mémoire (les fichiers, eux, restent sur disque)
+PREPARED_IMAGES_MAX = 512
+# Les fichiers préparés inutilisés depuis ce délai (secondes) sont supprimés
+PREPARED_IMAGES_MAX_AGE = 7 * 24 * 3600
+# Intervalle minimal entre deux nettoyages du dossier, et entre deux mises à jour de la date d'un fichier
+PREPARED_IMAGES_CLEANUP_EVERY = 3600
+_prepared_images = OrderedDict()
+_prepared_images_lock = threading.Lock()
+_last_prepared_cleanup = 0.0
+
+def get_pdf_profile(profile: str) -> dict:
+    if profile not in PDF_PROFILES:
+        raise ValueError(f"Profil PDF inconnu : {profile} (choix : {', '.join(PDF_PROFILES)})")
+    return PDF_PROFILES[profile]
+
+def _remember_prepared_image(cache_key, out_path):
+    """
+    Mémorise une image préparée ; au-delà de PREPARED_IMAGES_MAX, oublie les plus anciennes.
+    Le fichier n'est pas supprimé : un autre thread ou processus peut être en train de le dessiner.
+    """
+    with _prepared_images_lock:
+        _prepared_images[cache_key] = out_path
+        _prepared_images.move_to_end(cache_key)
+        while len(_prepared_images) > PREPARED_IMAGES_MAX:
+            _prepared_images.popitem(last=False)
+
+def _touch_prepared_image(out_path) -> bool:
+    """Marque le fichier comme utilisé (sa date protège du nettoyage) ; False s'il n'existe plus."""
+    try:
+        if time.time() - os.stat(out_path).st_mtime > PREPARED_IMAGES_CLEANUP_EVERY:
+            os.utime(out_path)
+        return True
+    except OSError:
+        return False
+
+def cleanup_prepared_images(max_age: float = PREPARED_IMAGES_MAX_AGE) -> int:
+    """Supprime les images préparées inutilisées depuis max_age secondes ; renvoie leur nombre."""
+    removed = 0
+    limit = time.time() - max_age
+    try:
+        entries = list(os.scandir(PREPARED_IMAGES_DIR))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < limit:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+def _maybe_cleanup_prepared_images():
+    global _last_prepared_cleanup
+    with _prepared_images_lock:
+        if time.time() - _last_prepared_cleanup < PREPARED_IMAGES_CLEANUP_EVERY:
+            return
+        _last_prepared_cleanup = time.time()
+    cleanup_prepared_images()
+
+def prepare_image(path: str, w: float, h: float, profile: str) -> str:
+    """
+    Version de l'image adaptée au profil pour un affichage en w × h points :
+    réduite à la résolution du profil, recompressée en JPEG si elle est opaque,
+    ou ramenée à une palette réduite si elle a de la transparence (icônes).
+    Le fichier préparé est nommé d'après le contenu de la source, la taille affichée
+    et le profil : un graphique identique rendu dans un autre dossier de travail, ou
+    par un autre processus, le retrouve sans décoder l'image.
+    """
+    settings = get_pdf_profile(profile)
+    if settings["image_dpi"] is None and settings["jpeg_quality"] is None and settings["icon_colors"] is None:
+        return path
+
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    cache_key = (digest, round(w), round(h), profile)
+    with _prepared_images_lock:
+        cached_path = _prepared_images.get(cache_key)
+    if cached_path and _touch_prepared_image(cached_path):
+        _remember_prepared_image(cache_key, cached_path)
+        return cached_path
+
+    # --- Déjà préparée (par ce processus ou un autre) : l'extension dépend de la transparence
+    stem = os.path.join(PREPARED_IMAGES_DIR, f"{digest}_{round(w)}x{round(h)}_{profile}")
+    for ext in (".jpg", ".png"):
+        if _touch_prepared_image(stem + ext):
+            _remember_prepared_image(cache_key, stem + ext)
+            return stem + ext
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if has_alpha:
+        img = img.convert("RGBA")
+        has_alpha = img.getchannel("A").getextrema()[0] < 255
+    img = img.convert("RGBA" if has_alpha else "RGB")
+
+    # --- Réduction à la taille affichée (en conservant les proportions, comme drawImage)
+    if settings["image_dpi"]:
+        scale = min(w * settings["image_dpi"] / 72 / img.width, h * settings["image_dpi"] / 72 / img.height)
+        if scale < 1:
+            size = (max(1, math.ceil(img.width * scale)), max(1, math.ceil(img.height * scale)))
+            img = img.resize(size, Image.LANCZOS)
+
+    use_jpeg = not has_alpha and settings["jpeg_quality"] is not None
+    out_path = stem + (".jpg" if use_jpeg else ".png")
+
+    os.makedirs(PREPARED_IMAGES_DIR, exist_ok=True)
+    _maybe_cleanup_prepared_images()
+    # Fichier temporaire unique (sessions Streamlit = threads d'un même processus)
+    fd, tmp_path = tempfile.mkstemp(dir=PREPARED_IMAGES_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            if use_jpeg:
+                img.save(tmp_file, "JPEG", quality=settings["jpeg_quality"], optimize=True)
+            else:
+                if settings["icon_colors"]:
+                    img = img.quantize(colors=settings["icon_colors"], method=Image.Quantize.FASTOCTREE)
+                img.save(tmp_file, "PNG", optimize=True)
+        os.replace(tmp_path, out_path)  # écriture atomique
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _remember_prepared_image(cache_key, out_path)
+    return out_path
+
+def process_pool(workers: int, initializer=None) -> ProcessPoolExecutor:
+    """
+    Pool de processus qui ne copie pas le processus appelant (pas de fork) : Streamlit
+    est multi-thread, et un fork peut hériter d'un verrou tenu par un autre thread.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                               initializer=initializer)
+
+# ---------- Contenu de la page athlète (commun au PDF et au rapport HTML) ----------
+
+# (titre = clé de l'athlète, icône, suffixe, colonne, ligne)
+ATHLETE_CARDS = [
+    ("FC Couché", "./icons/rythme-cardiaque (1).png", None, 0, 0),
+    ("FC Debout", "./icons/rythme-cardiaque (1).png", None, 0, 1),
+    ("% Réserve", "./icons/boulon.png", "%", 1, 0),
+    ("% Régénération", "./icons/regeneration.png", "%", 1, 1),
+    ("% Capacité Effort", "./icons/intensite.png", "%", 2, 0),
+]
+
+# Statut de la recommandation -> (libellé, couleur) ; l'icône vient de legend_icons[statut]
+STATUS_LEVELS = {
+    "ok": ("OK", green),
+    "vigilance": ("Vigilance", orange),
+    "danger": ("Danger", red),
+}
+
+MENSTRUATION_MESSAGE = "Attention : Menstruations"
+
+def athlete_status(a: dict) -> str:
+    """Clé de STATUS_LEVELS pour la recommandation de l'athlète (OK par défaut)."""
+    statut = (a.get("Recommandations") or "OK").strip().lower()
+    return statut if statut in STATUS_LEVELS else "ok"
+
+def format_card_value(value, suffix=None) -> str:
+    try:
+        # Si numérique → formaté avec suffixe
+        return f"{float(value):.0f}{suffix if suffix else ''}"
+    except (ValueError, TypeError):
+        return str(value)
 
 # ---------- Utilitaires de mise en forme ----------
 
@@ -16,7 +214,7 @@ def format_date_fr(d: date) -> str:
     j = JOURS_FR[d.weekday()]
     return f"{j.capitalize()} {d.day} {MOIS_FR[d.month-1]} {d.year}"
 
-def safe_draw_image(c: canvas.Canvas, path: str, x: float, y: float, w: float, h: float):
+def safe_draw_image(c: canvas.Canvas, path: str, x: float, y: float, w: float, h: float, profile=None):
     if not path:
         c.setFillColorRGB(0.9, 0.9, 0.9)
         c.roundRect(x, y, w, h, 6, fill=True, stroke=0)
@@ -25,7 +223,9 @@ def safe_draw_image(c: canvas.Canvas, path: str, x: float, y: float, w: float, h
         c.drawCentredString(x + w/2, y + h/2 - 4, "image")
         return
     try:
-        c.drawImage(ImageReader(path), x, y, width=w, height=h, preserveAspectRatio=True, mask='auto')
+        # Nom de fichier : une image préparée n'est intégrée qu'une fois dans le PDF
+        image = prepare_image(path, w, h, profile) if profile else ImageReader(path)
+        c.drawImage(image, x, y, width=w, height=h, preserveAspectRatio=True, mask='auto')
     except Exception:
         c.setFillColorRGB(0.9, 0.9, 0.9)
         c.roundRect(x, y, w, h, 6, fill=True, stroke=0)
@@ -33,9 +233,9 @@ def safe_draw_image(c: canvas.Canvas, path: str, x: float, y: float, w: float, h
         c.setFont("Helvetica", 8)
         c.drawCentredString(x + w/2, y + h/2 - 4, "image")
 
-def chip_icon(c, x, y, size, color, label, icon_path=None):
+def chip_icon(c, x, y, size, color, label, icon_path=None, profile=None):
     if icon_path:
-        safe_draw_image(c, icon_path, x, y, size, size)
+        safe_draw_image(c, icon_path, x, y, size, size, profile)
     else:
         c.setFillColor(color)
         c.circle(x + size/2, y + size/2, size/2, fill=True, stroke=0)
@@ -43,14 +243,14 @@ def chip_icon(c, x, y, size, color, label, icon_path=None):
     c.setFont("Helvetica", 10)
     c.drawString(x + size + 6, y + size/2 - 3, label)
 
-def draw_header(c, title, date_str, left_logo=None, right_logo=None, page_w=A4[0], page_h=A4[1]):
+def draw_header(c, title, date_str, left_logo=None, right_logo=None, page_w=A4[0], page_h=A4[1], profile=None):
     margin = 1.5 * cm
     logo_h = 2.2 * cm
     logo_w = 2.2 * cm
 
     # Logos
-    safe_draw_image(c, left_logo, margin, page_h - margin - logo_h, logo_w, logo_h)
-    safe_draw_image(c, right_logo, page_w - margin - logo_w, page_h - margin - logo_h, logo_w, logo_h)
+    safe_draw_image(c, left_logo, margin, page_h - margin - logo_h, logo_w, logo_h, profile)
+    safe_draw_image(c, right_logo, page_w - margin - logo_w, page_h - margin - logo_h, logo_w, logo_h, profile)
 
     # ✅ Gérer les titres multi-lignes
     c.setFont("Helvetica-Bold", 16)
@@ -64,7 +264,7 @@ def draw_header(c, title, date_str, left_logo=None, right_logo=None, page_w=A4[0
     c.setFont("Helvetica", 10)
     c.drawCentredString(page_w / 2, text_y - (len(title.splitlines()) * 18) - 10, date_str)
 
-def draw_card(c, x, y, w, h, title, value_text, icon_path=None, suffix=None):
+def draw_card(c, x, y, w, h, title, value_text, icon_path=None, suffix=None, profile=None):
     """
     Carte modernisée :
     - Titre en haut à gauche (taille 12)
@@ -89,47 +289,54 @@ def draw_card(c, x, y, w, h, title, value_text, icon_path=None, suffix=None):
             x + w - icon_size - 8,  # marge à droite
             y + h - icon_size - 8,  # marge en haut
             icon_size,
-            icon_size
+            icon_size,
+            profile
         )
 
     # --- Valeur (centrée en bas) ---
     c.setFont("Helvetica-Bold", 14)
-    try:
-        # Si numérique → formaté avec suffixe
-        text = f"{float(value_text):.0f}{suffix if suffix else ''}"
-    except (ValueError, TypeError):
-        text = str(value_text)
+    text = format_card_value(value_text, suffix)
 
     # Position verticale : 25% de la hauteur
     c.drawCentredString(x + w / 2, y + 0.25 * h, text)
 
-# ---------- Génération du rapport ----------
+def draw_overview_page(c, chart_path, title="Vue d'ensemble de la période", date_str="", profile=None):
+    """
+    Page paysage dédiée à la heatmap nageurs × jours.
+    Remet le format A4 portrait pour les pages suivantes.
+    """
+    page_w, page_h = landscape(A4)
+    margin = 1.5 * cm
+    c.setPageSize((page_w, page_h))
 
-def generate_hrv_report(
-    output_pdf_path: str,
-    report_date: date,
-    athletes: list,
-    left_logo_path=None,
-    right_logo_path=None,
-    daily_chart_path=None,
-    legend_icons=None,
-):
-    os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
-    c = canvas.Canvas(output_pdf_path, pagesize=A4)
+    c.setFont("Helvetica-Bold", 16)
+    c.setFillColor(black)
+    c.drawString(margin, page_h - margin - 10, title)
+    if date_str:
+        c.setFont("Helvetica", 10)
+        c.drawString(margin, page_h - margin - 26, date_str)
+
+    chart_top = page_h - margin - 40
+    safe_draw_image(c, chart_path, margin, margin, page_w - 2 * margin, chart_top - margin, profile)
+
+    c.showPage()
+    c.setPageSize(A4)
+
+def draw_cover_page(c, report_date, left_logo_path=None, right_logo_path=None,
+                    daily_chart_path=None, legend_icons=None, profile=None):
+    """Page de garde : en-tête, graphique quotidien et légende."""
     page_w, page_h = A4
     margin = 1.5 * cm
 
-    # ---------- PAGE DE GARDE ----------
     title = "Rapport ASM Natation\nVariabilité Fréquence Cardiaque"
-    draw_header(c, title, format_date_fr(report_date), left_logo_path, right_logo_path, page_w, page_h)
-
+    draw_header(c, title, format_date_fr(report_date), left_logo_path, right_logo_path, page_w, page_h, profile)
 
     # Graphique quotidien agrandi
     chart_w = page_w - 2 * margin
     chart_h = 15 * cm
     chart_x = margin
     chart_y = page_h - (margin + 3.2 * cm + 40 + chart_h)
-    safe_draw_image(c, daily_chart_path, chart_x, chart_y, chart_w, chart_h)
+    safe_draw_image(c, daily_chart_path, chart_x, chart_y, chart_w, chart_h, profile)
 
     # Séparation
     c.setStrokeColor(gray)
@@ -145,167 +352,395 @@ def generate_hrv_report(
     c.setFillColor(black)
     c.drawString(margin * 2, legend_y + 2.5 * cm, "Légende :")
 
-    chip_icon(c, margin, legend_y + 1.2 * cm, 14, red, "Cycle menstruel", legend_icons.get("menstruation"))
-    chip_icon(c, margin + 6 * cm, legend_y + 1.2 * cm, 14, green, "OK", legend_icons.get("ok"))
-    chip_icon(c, margin + 10.5 * cm, legend_y + 1.2 * cm, 14, orange, "Vigilance", legend_icons.get("vigilance"))
-    chip_icon(c, margin + 15 * cm, legend_y + 1.2 * cm, 14, red, "Danger", legend_icons.get("danger"))
+    chip_icon(c, margin, legend_y + 1.2 * cm, 14, red, "Cycle menstruel", legend_icons.get("menstruation"), profile)
+    chip_icon(c, margin + 6 * cm, legend_y + 1.2 * cm, 14, green, "OK", legend_icons.get("ok"), profile)
+    chip_icon(c, margin + 10.5 * cm, legend_y + 1.2 * cm, 14, orange, "Vigilance", legend_icons.get("vigilance"), profile)
+    chip_icon(c, margin + 15 * cm, legend_y + 1.2 * cm, 14, red, "Danger", legend_icons.get("danger"), profile)
 
     c.showPage()
 
-    # ---------- PAGES ATHLÈTES ----------
-    for a in athletes:
-        nom = a.get("Nom", "Athlète")
-        d_str = format_date_fr(report_date)
+def draw_athlete_page(c, a, report_date, legend_icons=None, profile=None):
+    """Page individuelle : cartes, graphiques et bloc recommandations."""
+    page_w, page_h = A4
+    margin = 1.5 * cm
+    if legend_icons is None:
+        legend_icons = {}
 
-        # Titre
-        c.setFont("Helvetica-Bold", 16)
-        c.setFillColor(black)
-        c.drawString(margin, page_h - margin - 10, f"Rapport Individuel de {nom}")
-        c.setFont("Helvetica", 10)
-        c.drawString(margin, page_h - margin - 26, d_str)
-
-        # === Cartes organisées en 3 colonnes ===
-        card_h = 1.8 * cm
-        col_gap = 0.8 * cm
-        col_w = (page_w - 2 * margin - 2 * col_gap) / 3  # 3 colonnes
-        top_y = page_h - margin - 26 - 2 * cm
-
-        col1_x = margin
-        col2_x = margin + col_w + col_gap
-        col3_x = margin + 2 * (col_w + col_gap)
-
-        # --- Icônes ---
-        heart_icon = "./icons/rythme-cardiaque (1).png"
-        perf_icons = {
-            "% Réserve": "./icons/boulon.png",
-            "% Régénération": "./icons/regeneration.png",
-            "% Capacité Effort": "./icons/intensite.png",
-        }
-
-        # --- Colonne 1 : FC Couché / FC Debout ---
-        draw_card(c, col1_x, top_y - card_h, col_w, card_h,
-                "FC Couché", a.get("FC Couché", 0), icon_path=heart_icon)
-        draw_card(c, col1_x, top_y - 2 * card_h - 0.4 * cm, col_w, card_h,
-                "FC Debout", a.get("FC Debout", 0), icon_path=heart_icon)
-
-        # --- Colonne 2 : Réserve / Régénération ---
-        draw_card(c, col2_x, top_y - card_h, col_w, card_h,
-                "% Réserve", a.get("% Réserve", 0), icon_path=perf_icons.get("% Réserve"), suffix="%")
-        draw_card(c, col2_x, top_y - 2 * card_h - 0.4 * cm, col_w, card_h,
-                "% Régénération", a.get("% Régénération", 0), icon_path=perf_icons.get("% Régénération"), suffix="%")
-
-        # --- Colonne 3 : Capacité d'effort ---
-        draw_card(c, col3_x, top_y - card_h, col_w, card_h,
-                "% Capacité Effort", a.get("% Capacité Effort", 0), icon_path=perf_icons.get("% Capacité Effort"), suffix="%")
-
-        # ✅ Nouvelle variable cohérente pour placer les graphiques en dessous
-        cards_bottom_y = top_y - 2 * card_h - 0 * cm
-
-        # === Graphiques côte à côte ===
-        gap = 0.6 * cm
-        charts_h = 6.5 * cm
-        charts_w = (page_w - 2 * margin - gap) / 2
-        charts_y = cards_bottom_y - 2 * cm - charts_h  # ✅ utilise cards_bottom_y
-
-        # draw_card(c, margin, charts_y + charts_h + 0.5 * cm, charts_w, 0.6 * cm, "", "")
-        safe_draw_image(c, a.get("chart_left"), margin, charts_y, charts_w, charts_h)
-        safe_draw_image(c, a.get("chart_right"), margin + charts_w + gap, charts_y, charts_w, charts_h)
-
-        # === Bloc Recommandations + Commentaires ===
-        rec_y = charts_y - 3.5 * cm - 1 * cm  # ↳ ajoute une marge de 30 px (~0.8 cm)
-        block_h = 4.0 * cm
-        block_w = page_w - 2 * margin
-
-        # Fond de la carte
-        c.setFillColorRGB(0.97, 0.97, 0.97)
-        c.roundRect(margin, rec_y, block_w, block_h, 12, fill=True, stroke=1)
-
-        # Titre "Recommandations"
-        c.setFont("Helvetica-Bold", 11)
-        c.setFillColor(black)
-        c.drawString(margin + 0.6 * cm, rec_y + block_h - 16, "Recommandations")
-
-        # Définir les zones gauche / droite
-        left_w = 4.5 * cm
-        right_x = margin + left_w + 0.3 * cm
-
-        # Trait de séparation vertical
-        c.setStrokeColorRGB(0.6, 0.6, 0.6)
-        c.setLineWidth(1)
-        c.line(right_x, rec_y + 0.5 * cm, right_x, rec_y + block_h - 0.5 * cm)
-
-        # === Colonne gauche : icône + label ===
-        statut = (a.get("Recommandations") or "OK").strip().lower()
-        status_map = {
-            "ok": ("OK", green, legend_icons.get("ok")),
-            "vigilance": ("Vigilance", orange, legend_icons.get("vigilance")),
-            "danger": ("Danger", red, legend_icons.get("danger")),
-        }
-        label_statut, color_statut, icon_statut = status_map.get(statut, ("OK", green, legend_icons.get("ok")))
-
-        # Icône centrée verticalement dans la colonne gauche
-        icon_size = 40
-        icon_x = margin + (left_w - icon_size) / 2
-        icon_y = rec_y + (block_h - icon_size) / 2
-        safe_draw_image(c, icon_statut, icon_x, icon_y, icon_size, icon_size)
-
-        # Texte du statut sous l’icône
-        c.setFont("Helvetica-Bold", 12)
+    nom = a.get("Nom", "Athlète")
+    d_str = format_date_fr(report_date)
+
+    # Titre
+    c.setFont("Helvetica-Bold", 16)
+    c.setFillColor(black)
+    c.drawString(margin, page_h - margin - 10, f"Rapport Individuel de {nom}")
+    c.setFont("Helvetica", 10)
+    c.drawString(margin, page_h - margin - 26, d_str)
+
+    # === Cartes organisées en 3 colonnes ===
+    card_h = 1.8 * cm
+    col_gap = 0.8 * cm
+    col_w = (page_w - 2 * margin - 2 * col_gap) / 3  # 3 colonnes
+    top_y = page_h - margin - 26 - 2 * cm
+
+    col_x = [margin + i * (col_w + col_gap) for i in range(3)]
+
+    # --- Colonne 1 : FC Couché / FC Debout, 2 : Réserve / Régénération, 3 : Capacité d'effort ---
+    for title, icon_path, suffix, col, row in ATHLETE_CARDS:
+        draw_card(c, col_x[col], top_y - card_h - row * (card_h + 0.4 * cm), col_w, card_h,
+                  title, a.get(title, 0), icon_path=icon_path, suffix=suffix, profile=profile)
+
+    # ✅ Nouvelle variable cohérente pour placer les graphiques en dessous
+    cards_bottom_y = top_y - 2 * card_h - 0 * cm
+
+    # === Alertes de tendance (historique) entre les cartes et les graphiques ===
+    trend_lines = a.get("Alertes tendance") or []
+    if trend_lines:
+        c.setFont("Helvetica-Bold", 9)
+        c.setFillColor(orange)
+        line_y = cards_bottom_y - 0.4 * cm - 12
+        for line in trend_lines[:3]:
+            c.drawString(margin, line_y, f"Tendance - {line}")
+            line_y -= 11
         c.setFillColor(black)
-        c.drawCentredString(margin + left_w / 2, rec_y + 0.4 * cm, label_statut)
 
-        # === Colonne droite : commentaires ===
-        comm_x = right_x + 0.5 * cm
-        comm_w = page_w - comm_x - margin
-        comments = a.get("Commentaires", "").strip()
+    # === Graphiques côte à côte ===
+    gap = 0.6 * cm
+    charts_h = 6.5 * cm
+    charts_w = (page_w - 2 * margin - gap) / 2
+    charts_y = cards_bottom_y - 2 * cm - charts_h  # ✅ utilise cards_bottom_y
 
-        c.setFont("Helvetica", 11)
-        c.setFillColor(black)
+    # draw_card(c, margin, charts_y + charts_h + 0.5 * cm, charts_w, 0.6 * cm, "", "")
+    safe_draw_image(c, a.get("chart_left"), margin, charts_y, charts_w, charts_h, profile)
+    safe_draw_image(c, a.get("chart_right"), margin + charts_w + gap, charts_y, charts_w, charts_h, profile)
 
-        # --- Fonction utilitaire : couper automatiquement le texte ---
-        def wrap_text(text, font_name, font_size, max_width):
-            words = text.split()
-            lines = []
-            line = ""
-            for word in words:
-                test_line = (line + " " + word).strip()
-                if c.stringWidth(test_line, font_name, font_size) <= max_width:
-                    line = test_line
-                else:
-                    lines.append(line)
-                    line = word
-            if line:
-                lines.append(line)
-            return lines
+    # === Bloc Recommandations + Commentaires ===
+    rec_y = charts_y - 3.5 * cm - 1 * cm  # ↳ ajoute une marge de 30 px (~0.8 cm)
+    block_h = 4.0 * cm
+    block_w = page_w - 2 * margin
+
+    # Fond de la carte
+    c.setFillColorRGB(0.97, 0.97, 0.97)
+    c.roundRect(margin, rec_y, block_w, block_h, 12, fill=True, stroke=1)
 
-        # --- Découper et afficher ---
-        lines = wrap_text(comments, "Helvetica", 11, comm_w - 10)
-        text_y = rec_y + block_h - 18
-        for ln in lines[:6]:  # max 6 lignes
-            c.drawString(comm_x, text_y, ln)
-            text_y -= 13
+    # Titre "Recommandations"
+    c.setFont("Helvetica-Bold", 11)
+    c.setFillColor(black)
+    c.drawString(margin + 0.6 * cm, rec_y + block_h - 16, "Recommandations")
 
-         # === Si Menstruation : icône + message en bas du bloc ===
-        if a.get("Menstruation", False):
-            menstruation_icon = legend_icons.get("menstruation", "./icons/menstruation.png")
+    # Définir les zones gauche / droite
+    left_w = 4.5 * cm
+    right_x = margin + left_w + 0.3 * cm
 
-            # Taille et position
-            icon_size = 16
-            msg_y = rec_y + 6  # marge depuis le bas du bloc
-            msg_x_center = margin + block_w / 2  # centré horizontalement
+    # Trait de séparation vertical
+    c.setStrokeColorRGB(0.6, 0.6, 0.6)
+    c.setLineWidth(1)
+    c.line(right_x, rec_y + 0.5 * cm, right_x, rec_y + block_h - 0.5 * cm)
 
-            # Icône à gauche du texte
-            icon_x = msg_x_center - 75 # icône à gauche du texte
-            icon_y = msg_y - 2
-            safe_draw_image(c, menstruation_icon, icon_x, icon_y, icon_size, icon_size)
+    # === Colonne gauche : icône + label ===
+    statut = athlete_status(a)
+    label_statut, color_statut = STATUS_LEVELS[statut]
+    icon_statut = legend_icons.get(statut)
 
-            # Texte d’avertissement
-            c.setFont("Helvetica-Bold", 10)
-            c.setFillColor(red)
-            c.drawCentredString(msg_x_center + 10, msg_y + 3, "Attention : Menstruations")
+    # Icône centrée verticalement dans la colonne gauche
+    icon_size = 40
+    icon_x = margin + (left_w - icon_size) / 2
+    icon_y = rec_y + (block_h - icon_size) / 2
+    safe_draw_image(c, icon_statut, icon_x, icon_y, icon_size, icon_size, profile)
+
+    # Texte du statut sous l’icône
+    c.setFont("Helvetica-Bold", 12)
+    c.setFillColor(black)
+    c.drawCentredString(margin + left_w / 2, rec_y + 0.4 * cm, label_statut)
 
-        # ✅ Ajoute cette ligne à la fin de la boucle pour forcer un saut de page
-        c.showPage()
+    # === Colonne droite : commentaires ===
+    comm_x = right_x + 0.5 * cm
+    comm_w = page_w - comm_x - margin
+    comments = a.get("Commentaires", "").strip()
+
+    c.setFont("Helvetica", 11)
+    c.setFillColor(black)
+
+    # --- Fonction utilitaire : couper automatiquement le texte ---
+    def wrap_text(text, font_name, font_size, max_width):
+        words = text.split()
+        lines = []
+        line = ""
+        for word in words:
+            test_line = (line + " " + word).strip()
+            if c.stringWidth(test_line, font_name, font_size) <= max_width:
+                line = test_line
+            else:
+                lines.append(line)
+                line = word
+        if line:
+            lines.append(line)
+        return lines
+
+    # --- Découper et afficher ---
+    lines = wrap_text(comments, "Helvetica", 11, comm_w - 10)
+    text_y = rec_y + block_h - 18
+    for ln in lines[:6]:  # max 6 lignes
+        c.drawString(comm_x, text_y, ln)
+        text_y -= 13
+
+     # === Si Menstruation : icône + message en bas du bloc ===
+    if a.get("Menstruation", False):
+        menstruation_icon = legend_icons.get("menstruation", "./icons/menstruation.png")
+
+        # Taille et position
+        icon_size = 16
+        msg_y = rec_y + 6  # marge depuis le bas du bloc
+        msg_x_center = margin + block_w / 2  # centré horizontalement
+
+        # Icône à gauche du texte
+        icon_x = msg_x_center - 75 # icône à gauche du texte
+        icon_y = msg_y - 2
+        safe_draw_image(c, menstruation_icon, icon_x, icon_y, icon_size, icon_size, profile)
+
+        # Texte d’avertissement
+        c.setFont("Helvetica-Bold", 10)
+        c.setFillColor(red)
+        c.drawCentredString(msg_x_center + 10, msg_y + 3, MENSTRUATION_MESSAGE)
+
+    # ✅ Saut de page à la fin de chaque page athlète
+    c.showPage()
+
+# ---------- Génération du rapport ----------
+
+def generate_hrv_report(
+    output_pdf_path: str,
+    report_date: date,
+    athletes: list,
+    left_logo_path=None,
+    right_logo_path=None,
+    daily_chart_path=None,
+    legend_icons=None,
+    overview_chart_path=None,
+    profile="archive",
+):
+    """
+    `profile` : "screen" (léger, pour téléphone), "print" ou "archive"
+    (images d'origine). Voir PDF_PROFILES.
+    """
+    settings = get_pdf_profile(profile)
+    os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
+    c = canvas.Canvas(output_pdf_path, pagesize=A4, pageCompression=settings["page_compression"])
+
+    # ---------- PAGE DE GARDE ----------
+    draw_cover_page(c, report_date, left_logo_path, right_logo_path, daily_chart_path, legend_icons, profile)
+
+    # ---------- VUE D'ENSEMBLE (optionnelle) ----------
+    if overview_chart_path:
+        draw_overview_page(c, overview_chart_path, date_str=format_date_fr(report_date), profile=profile)
+
+    # ---------- PAGES ATHLÈTES ----------
+    for a in athletes:
+        draw_athlete_page(c, a, report_date, legend_icons, profile)
 
     c.save()
     print(f"✅ Rapport sauvegardé : {output_pdf_path}")
+
+# ---------- Génération en parallèle (gros rapports) ----------
+
+def _render_athlete_shard(shard_path, report_date, athletes, legend_icons, profile):
+    """Rend un groupe de pages athlètes dans un PDF partiel (exécuté dans un processus séparé)."""
+    settings = get_pdf_profile(profile)
+    c = canvas.Canvas(shard_path, pagesize=A4, pageCompression=settings["page_compression"])
+    for a in athletes:
+        draw_athlete_page(c, a, report_date, legend_icons, profile)
+    c.save()
+    return shard_path
+
+def _image_fingerprint(xobject, memo):
+    """
+    Empreinte du contenu d'une image XObject : flux brut, dictionnaire (hors longueur)
+    et empreinte de son masque de transparence (/SMask), lui-même une image.
+    """
+    key = xobject.indirect_reference.idnum if xobject.indirect_reference else id(xobject)
+    if key not in memo:
+        digest = hashlib.sha256(xobject.get_data())  # contenu décodé du flux
+        for name in sorted(xobject):
+            if name in ("/Length", "/SMask"):
+                continue
+            digest.update(f"{name}={xobject[name].get_object()!r};".encode("utf-8"))
+        if "/SMask" in xobject:
+            digest.update(_image_fingerprint(xobject["/SMask"].get_object(), memo).encode("ascii"))
+        memo[key] = digest.hexdigest()
+    return memo[key]
+
+def merge_identical_images(writer) -> int:
+    """
+    Fait pointer toutes les pages vers un seul exemplaire de chaque image identique.
+    reportlab donne à chaque image son propre /SMask : compress_identical_objects ne
+    les voit donc pas comme identiques et les garderait une fois par PDF fusionné.
+    Retourne le nombre de références remplacées (les copies deviennent orphelines).
+    """
+    canonical, memo, replaced = {}, {}, 0
+    for page in writer.pages:
+        xobjects = page.get("/Resources", {}).get("/XObject")
+        if not xobjects:
+            continue
+        xobjects = xobjects.get_object()
+        for name in list(xobjects):
+            ref = xobjects.raw_get(name)  # référence indirecte, pas l'objet résolu
+            xobject = ref.get_object()
+            if xobject.get("/Subtype") != "/Image":
+                continue
+            first = canonical.setdefault(_image_fingerprint(xobject, memo), ref)
+            if first.idnum != ref.idnum:
+                xobjects[name] = first
+                replaced += 1
+    return replaced
+
+def image_xobject_count(pdf_path: str) -> int:
+    """Nombre d'images distinctes utilisées par les pages d'un PDF (contrôle de la fusion)."""
+    from pypdf import PdfReader
+
+    refs = set()
+    for page in PdfReader(pdf_path).pages:
+        xobjects = page.get("/Resources", {}).get("/XObject") or {}
+        xobjects = xobjects.get_object()
+        refs.update(xobjects.raw_get(name).idnum for name in xobjects
+                    if xobjects[name].get("/Subtype") == "/Image")
+    return len(refs)
+
+def generate_hrv_report_sharded(
+    output_pdf_path: str,
+    report_date: date,
+    athletes: list,
+    left_logo_path=None,
+    right_logo_path=None,
+    daily_chart_path=None,
+    legend_icons=None,
+    overview_chart_path=None,
+    profile="archive",
+    workers=None,
+    shard_size=None,
+):
+    """
+    Même rapport que generate_hrv_report, mais les pages athlètes sont rendues
+    par groupes dans des PDF partiels, en parallèle sur plusieurs processus,
+    puis fusionnées dans l'ordre derrière la page de garde.
+    Les ressources communes (logos, icônes) ne sont gardées qu'une fois dans le PDF final.
+    """
+    from pypdf import PdfWriter
+
+    workers = workers or os.cpu_count() or 1
+    # ~2 groupes par processus pour équilibrer la charge
+    shard_size = shard_size or max(1, math.ceil(len(athletes) / (2 * workers)))
+    shards = [athletes[i:i + shard_size] for i in range(0, len(athletes), shard_size)]
+    if workers == 1 or len(shards) <= 1:
+        return generate_hrv_report(output_pdf_path, report_date, athletes, left_logo_path, right_logo_path,
+                                   daily_chart_path, legend_icons, overview_chart_path, profile)
+
+    settings = get_pdf_profile(profile)
+    os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
+    shard_dir = tempfile.mkdtemp(prefix="shards_", dir=os.path.dirname(output_pdf_path))
+    try:
+        with process_pool(min(workers, len(shards))) as pool:
+            futures = [
+                pool.submit(_render_athlete_shard, os.path.join(shard_dir, f"athletes_{i:04d}.pdf"),
+                            report_date, shard, legend_icons, profile)
+                for i, shard in enumerate(shards)
+            ]
+
+            # Page de garde (+ vue d'ensemble) pendant que les processus travaillent
+            head_path = os.path.join(shard_dir, "head.pdf")
+            c = canvas.Canvas(head_path, pagesize=A4, pageCompression=settings["page_compression"])
+            draw_cover_page(c, report_date, left_logo_path, right_logo_path, daily_chart_path, legend_icons, profile)
+            if overview_chart_path:
+                draw_overview_page(c, overview_chart_path, date_str=format_date_fr(report_date), profile=profile)
+            c.save()
+
+            shard_paths = [head_path] + [f.result() for f in futures]
+
+        # --- Fusion dans l'ordre + dédoublonnage des images/polices communes
+        writer = PdfWriter()
+        for path in shard_paths:
+            writer.append(path)
+        merge_identical_images(writer)
+        writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+        with open(output_pdf_path, "wb") as f:
+            writer.write(f)
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    print(f"✅ Rapport sauvegardé : {output_pdf_path} ({len(shards)} groupes, {workers} processus)")
+
+# ---------- Rapports individuels (page de garde + page de l'athlète) ----------
+
+def safe_file_stem(nom: str, default: str = "athlete") -> str:
+    """Nom utilisable dans un chemin de fichier : lettres, chiffres, '-' et '_' uniquement."""
+    return re.sub(r"[^\w\-]+", "_", (nom or "").strip()).strip("_") or default
+
+def individual_report_filename(nom: str, report_date: date) -> str:
+    return f"Rapport_HRV_{safe_file_stem(nom)}_{report_date.strftime('%d-%m-%Y')}.pdf"
+
+def _unique_filenames(filenames) -> list:
+    """Ajoute _2, _3... aux noms de fichiers déjà pris (athlètes homonymes ou sans nom)."""
+    used, unique = set(), []
+    for filename in filenames:
+        stem, ext = os.path.splitext(filename)
+        candidate, n = filename, 1
+        while candidate in used:
+            n += 1
+            candidate = f"{stem}_{n}{ext}"
+        used.add(candidate)
+        unique.append(candidate)
+    return unique
+
+def _render_individual_reports(output_dir, report_date, jobs, left_logo_path, right_logo_path,
+                               daily_chart_path, legend_icons, profile):
+    """Rend un PDF par (athlète, nom de fichier) d'un groupe (exécuté dans un processus séparé)."""
+    settings = get_pdf_profile(profile)
+    paths = []
+    for a, filename in jobs:
+        path = os.path.join(output_dir, filename)
+        c = canvas.Canvas(path, pagesize=A4, pageCompression=settings["page_compression"])
+        draw_cover_page(c, report_date, left_logo_path, right_logo_path, daily_chart_path, legend_icons, profile)
+        draw_athlete_page(c, a, report_date, legend_icons, profile)
+        c.save()
+        paths.append(path)
+    return paths
+
+def generate_individual_reports(
+    output_dir: str,
+    report_date: date,
+    athletes: list,
+    left_logo_path=None,
+    right_logo_path=None,
+    daily_chart_path=None,
+    legend_icons=None,
+    profile="screen",
+    workers=None,
+):
+    """
+    Un PDF par athlète (page de garde + sa page), rendus en parallèle.
+    Les images communes sont préparées une seule fois (cache de prepare_image).
+    Retourne {id de l'athlète (ou son rang) : (Nom, chemin du PDF)} : deux athlètes
+    homonymes ou sans nom ont chacun leur fichier.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, max(len(athletes) - 1, 1))
+    assets = (left_logo_path, right_logo_path, daily_chart_path, legend_icons, profile)
+    filenames = _unique_filenames(individual_report_filename(a.get("Nom", ""), report_date) for a in athletes)
+    jobs = list(zip(athletes, filenames))
+
+    # Le premier rapport prépare les images communes avant de répartir le reste
+    paths = _render_individual_reports(output_dir, report_date, jobs[:1], *assets)
+    rest = jobs[1:]
+
+    if workers == 1:
+        paths += _render_individual_reports(output_dir, report_date, rest, *assets)
+    else:
+        size = max(1, math.ceil(len(rest) / workers))
+        with process_pool(workers) as pool:
+            futures = [pool.submit(_render_individual_reports, output_dir, report_date, rest[i:i + size], *assets)
+                       for i in range(0, len(rest), size)]
+            for f in futures:
+                paths += f.result()
+
+    reports = {a.get("id", i): ((a.get("Nom") or "").strip(), path)
+               for i, (a, path) in enumerate(zip(athletes, paths))}
+    print(f"✅ {len(reports)} rapports individuels sauvegardés dans : {output_dir}")
+    return reports
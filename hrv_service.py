@@ -0,0 +1,368 @@
+"""
+Service HTTP local de génération de rapports (hors ligne, sur la même machine).
+
+    python hrv_service.py --port 8502 --workers 4
+
+    POST /report   JSON -> PDF
+        {
+          "date": "2025-05-01",
+          "athletes": [{"Nom": "...", "% Régénération": 90, "% Capacité Effort": 66, "% Réserve": 74,
+                        "FC Couché": 60, "FC Debout": 86, "Menstruation": false,
+                        "Recommandations": "OK", "Commentaires": "..."}],
+          "reference": [{"Niveau": "Moyenne", "% Capacité Effort": 100, ...}, ...],
+          "profile": "screen"
+        }
+    GET  /health   état du service (dont redémarrages du pool de rendu)
+    GET  /metrics  nombre de requêtes, lots, latences (p50 / p95 / p99), cache
+
+Les requêtes simultanées sont regroupées en lots et rendues par un pool de
+processus déjà chauds ; des requêtes identiques dans un même lot ne sont rendues qu'une fois,
+et un rapport déjà rendu est resservi depuis le cache (--cache-mb) sans nouveau rendu.
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from hrv_cache import ReportCache, report_fingerprint
+from hrv_pdf import get_pdf_profile, process_pool
+
+LEFT_LOGO = "./icons/Logo_ASM_Clermont_Auvergne_2019.png"
+RIGHT_LOGO = "./icons/Elite-logo-dark.png"
+LEGEND_ICONS = {
+    "menstruation": "./icons/menstruation.png",
+    "ok": "./icons/ok.png",
+    "vigilance": "./icons/vigilance.png",
+    "danger": "./icons/danger.png",
+}
+
+MAX_BODY_BYTES = 5 * 2**20
+
+# Valeurs numériques obligatoires pour chaque athlète et chaque ligne de la table de référence
+ATHLETE_NUMERIC_KEYS = ["% Régénération", "% Capacité Effort", "% Réserve", "FC Couché", "FC Debout"]
+# Textes optionnels d'un athlète (chaîne ou null)
+ATHLETE_TEXT_KEYS = ["Recommandations", "Commentaires"]
+
+# ---------- Rendu (exécuté dans les processus du pool) ----------
+
+def _warm_worker():
+    """Charge matplotlib/reportlab et pré-rend le fond du graphique quotidien."""
+    import pandas as pd
+    from matplotlib_chart import create_daily_chart_matplotlib
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        create_daily_chart_matplotlib(
+            pd.DataFrame([{"Nom": "-", "% Régénération": 0, "% Capacité Effort": 0, "% Réserve": 0}]),
+            save_path=f"{work_dir}/warm.png",
+        )
+
+def render_report_pdf(payload: dict) -> bytes:
+    """Même enchaînement que le bouton 'Générer le rapport PDF' de app.py, renvoie les octets du PDF."""
+    import pandas as pd
+    from matplotlib_chart import create_daily_chart_matplotlib, create_radar_chart, create_triangle_chart
+    from hrv_pdf import generate_hrv_report
+
+    report_date = date.fromisoformat(payload["date"])
+    athletes = [dict(a) for a in payload["athletes"]]
+    df_ref = pd.DataFrame(payload["reference"]).set_index("Niveau")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        daily_chart_path = create_daily_chart_matplotlib(
+            df=pd.DataFrame(athletes), save_path=f"{work_dir}/daily_chart_matplotlib.png"
+        )
+        for i, athlete in enumerate(athletes):
+            athlete["chart_left"] = create_radar_chart(athlete, df_ref, f"{work_dir}/radar_{i}.png")
+            athlete["chart_right"] = create_triangle_chart(athlete, df_ref, f"{work_dir}/triangle_{i}.png")
+
+        pdf_path = f"{work_dir}/rapport.pdf"
+        generate_hrv_report(
+            output_pdf_path=pdf_path,
+            report_date=report_date,
+            athletes=athletes,
+            left_logo_path=LEFT_LOGO,
+            right_logo_path=RIGHT_LOGO,
+            daily_chart_path=daily_chart_path,
+            legend_icons=LEGEND_ICONS,
+            profile=payload.get("profile", "screen"),
+        )
+        with open(pdf_path, "rb") as f:
+            return f.read()
+
+def _invalid_numbers(row: dict) -> list:
+    """Clés numériques absentes ou invalides (booléen, texte, NaN, infini)."""
+    return [k for k in ATHLETE_NUMERIC_KEYS
+            if isinstance(row.get(k), bool) or not isinstance(row.get(k), (int, float))
+            or not math.isfinite(row[k])]
+
+def validate_payload(payload) -> dict:
+    """Vérifie la forme complète de la requête avant d'occuper un processus de rendu."""
+    if not isinstance(payload, dict):
+        raise ValueError("Le corps doit être un objet JSON")
+    missing = [k for k in ("date", "athletes", "reference") if k not in payload]
+    if missing:
+        raise ValueError(f"Champs manquants : {missing}")
+    if not isinstance(payload["date"], str):
+        raise ValueError("'date' doit être une chaîne AAAA-MM-JJ")
+    date.fromisoformat(payload["date"])
+    get_pdf_profile(payload.get("profile", "screen"))
+
+    athletes = payload["athletes"]
+    if not athletes or not isinstance(athletes, list):
+        raise ValueError("'athletes' doit être une liste non vide")
+    for i, a in enumerate(athletes):
+        if not isinstance(a, dict):
+            raise ValueError(f"athletes[{i}] doit être un objet")
+        if not isinstance(a.get("Nom", ""), str):
+            raise ValueError(f"athletes[{i}].Nom doit être une chaîne")
+        bad = _invalid_numbers(a)
+        if bad:
+            raise ValueError(f"athletes[{i}] : valeurs numériques manquantes ou invalides : {bad}")
+        bad = [k for k in ATHLETE_TEXT_KEYS if not isinstance(a.get(k), (str, type(None)))]
+        if bad:
+            raise ValueError(f"athletes[{i}] : {bad} doivent être des chaînes")
+
+    reference = payload["reference"]
+    if not reference or not isinstance(reference, list):
+        raise ValueError("'reference' doit être une liste non vide")
+    for i, r in enumerate(reference):
+        if not isinstance(r, dict) or not isinstance(r.get("Niveau"), str):
+            raise ValueError(f"reference[{i}] doit être un objet avec une colonne 'Niveau' (chaîne)")
+        bad = _invalid_numbers(r)
+        if bad:
+            raise ValueError(f"reference[{i}] : valeurs numériques manquantes ou invalides : {bad}")
+    return payload
+
+# ---------- Regroupement des requêtes ----------
+
+class ReportBatcher:
+    """
+    File d'attente des requêtes : un thread répartiteur les regroupe (fenêtre de
+    `batch_window` secondes, `max_batch` requêtes max) et envoie chaque rapport
+    distinct au pool de processus, partagé et chauffé au démarrage.
+    """
+
+    def __init__(self, workers=None, batch_window=0.05, max_batch=32, cache_mb=256):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.pool = process_pool(self.workers, initializer=_warm_worker)
+        self.pool_restarts = 0
+        self.last_error = None
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latencies = deque(maxlen=2000)
+        self.counts = {"requests": 0, "errors": 0, "batches": 0, "batched": 0, "renders": 0, "in_flight": 0}
+        self.cache = ReportCache(max_entries=128, max_bytes=int(cache_mb * 2**20))
+
+        # Démarre et chauffe tous les processus tout de suite, pas à la première requête
+        for f in [self.pool.submit(os.getpid) for _ in range(self.workers)]:
+            f.result()
+        threading.Thread(target=self._dispatch, name="report-batcher", daemon=True).start()
+
+    def submit(self, payload: dict) -> Future:
+        future = Future()
+        t0 = time.perf_counter()
+        key = report_fingerprint(
+            payload["date"],
+            payload["athletes"],
+            pd.DataFrame(payload["reference"]),
+            asset_paths=[LEFT_LOGO, RIGHT_LOGO, *LEGEND_ICONS.values()],
+            profile=payload.get("profile", "screen"),
+        )
+        cached = self.cache.get(key)
+        with self.lock:
+            self.counts["requests"] += 1
+            if cached is not None:
+                self.latencies.append(time.perf_counter() - t0)
+            else:
+                self.counts["in_flight"] += 1
+        if cached is not None:
+            future.set_result(cached)
+        else:
+            self.queue.put((key, payload, future, t0))
+        return future
+
+    def _dispatch(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Requêtes identiques (même empreinte) : un seul rendu pour toutes
+            groups = {}
+            for key, payload, future, t0 in batch:
+                groups.setdefault(key, (payload, []))[1].append((future, t0))
+
+            with self.lock:
+                self.counts["batches"] += 1
+                self.counts["batched"] += len(batch)
+                self.counts["renders"] += len(groups)
+            for key, (payload, waiters) in groups.items():
+                pool = self.pool
+                try:
+                    pool.submit(render_report_pdf, payload).add_done_callback(
+                        lambda done, key=key, waiters=waiters, pool=pool: self._resolve(done, key, waiters, pool)
+                    )
+                except Exception as e:  # pool cassé (processus tué) ou arrêté
+                    failed = Future()
+                    failed.set_exception(e)
+                    self._resolve(failed, key, waiters, pool)
+
+    def _restart_pool(self, broken_pool, error):
+        """Remplace un pool cassé (un processus est mort) ; les requêtes suivantes repartent dessus."""
+        with self.lock:
+            if self.pool is not broken_pool:
+                return  # déjà remplacé par un autre rendu en échec
+            self.pool = process_pool(self.workers, initializer=_warm_worker)
+            self.pool_restarts += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+        broken_pool.shutdown(wait=False, cancel_futures=True)
+        print(f"⚠️ Pool de rendu redémarré ({self.last_error})")
+
+    def _resolve(self, done: Future, key, waiters, pool):
+        error = done.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._restart_pool(pool, error)
+        elif not error:
+            self.cache.put(key, done.result())
+        now = time.perf_counter()
+        with self.lock:
+            for future, t0 in waiters:
+                self.latencies.append(now - t0)
+                self.counts["in_flight"] -= 1
+                if error:
+                    self.counts["errors"] += 1
+        for future, _ in waiters:
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result())
+
+    def health(self) -> dict:
+        with self.lock:
+            return {
+                "status": "ok",
+                "workers": self.workers,
+                "pool_restarts": self.pool_restarts,
+                "last_error": self.last_error,
+                "in_flight": self.counts["in_flight"],
+                "queued": self.queue.qsize(),
+                "uptime_s": round(time.time() - self.started, 1),
+            }
+
+    def metrics(self) -> dict:
+        with self.lock:
+            lat = np.array(self.latencies) * 1000
+            counts = dict(self.counts)
+        latency = {}
+        if lat.size:
+            latency = {
+                "mean": round(float(lat.mean()), 1),
+                "p50": round(float(np.percentile(lat, 50)), 1),
+                "p95": round(float(np.percentile(lat, 95)), 1),
+                "p99": round(float(np.percentile(lat, 99)), 1),
+                "max": round(float(lat.max()), 1),
+            }
+        counts["mean_batch_size"] = round(counts.pop("batched") / counts["batches"], 2) if counts["batches"] else 0
+        return {**counts, "latency_ms": latency, "cache": self.cache.stats()}
+
+# ---------- Serveur HTTP ----------
+
+def make_handler(batcher: ReportBatcher, timeout=300):
+
+    class ReportHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body: bytes, content_type="application/json", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status, data):
+            self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, batcher.health())
+            elif self.path == "/metrics":
+                self._send_json(200, batcher.metrics())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/report":
+                self._send_json(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self._send_json(413, {"error": "requête trop volumineuse"})
+                return
+            try:
+                payload = validate_payload(json.loads(self.rfile.read(length) or b"null"))
+            except (ValueError, TypeError) as e:  # JSONDecodeError inclus
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                pdf = batcher.submit(payload).result(timeout=timeout)
+            except Exception as e:
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            self._send(200, pdf, "application/pdf",
+                       {"Content-Disposition": f'attachment; filename="Rapport_HRV_ASM_{payload["date"]}.pdf"'})
+
+        def log_message(self, fmt, *args):
+            print(f"🌐 {self.address_string()} {fmt % args}")
+
+    return ReportHandler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP local de génération de rapports HRV")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=None, help="processus de rendu (défaut : nb de cœurs)")
+    parser.add_argument("--batch-window-ms", type=float, default=50, help="fenêtre de regroupement des requêtes")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--cache-mb", type=float, default=256, help="taille max du cache de rapports")
+    args = parser.parse_args(argv)
+
+    # Les icônes et le cache d'images sont en chemins relatifs au projet
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    batcher = ReportBatcher(args.workers, args.batch_window_ms / 1000, args.max_batch, args.cache_mb)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+    print(f"✅ Service de rapports sur http://{args.host}:{args.port} ({batcher.workers} processus)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.pool.shutdown(cancel_futures=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+# ---------- Détection de tendances sur l'historique ----------
+
+# Sens défavorable de chaque indicateur : +1 = une hausse est inquiétante, -1 = une baisse
+TREND_METRICS = {
+    "FC Couché": 1,
+    "FC Debout": 1,
+    "% Réserve": -1,
+    "% Régénération": -1,
+    "% Capacité Effort": -1,
+}
+
+# Écart-type minimal (bpm ou points de %) : évite des z-scores énormes sur un historique très stable
+MIN_STD = 1.0
+
+# Seuils par défaut, pour 5 indicateurs testés chaque jour et par nageur : sur un historique
+# de bruit pur, 1 à 2 % des nageurs ont une alerte un jour donné (cf. check_trends.py).
+#   - Pic        : un seul jour suffit, mais à plus de 3,5 écarts-types
+#   - Dérive     : EWMA à plus de 1,5 écart-type (≈ 3 fois son propre bruit sur 7 jours)
+#   - Changement : médiane récente au-delà de 3,5 erreurs-types de la référence
+# Dérive et changement doivent persister PERSISTENCE_DAYS mesures de suite.
+Z_THRESHOLD = 3.5
+DRIFT_THRESHOLD = 1.5
+SHIFT_THRESHOLD = 3.5
+PERSISTENCE_DAYS = 2
+
+def compute_trend_flags(
+    history_df: pd.DataFrame,
+    metrics=None,
+    span=7,
+    window=21,
+    recent=4,
+    z_threshold=Z_THRESHOLD,
+    drift_threshold=DRIFT_THRESHOLD,
+    shift_threshold=SHIFT_THRESHOLD,
+    persistence=PERSISTENCE_DAYS,
+    min_periods=7,
+) -> pd.DataFrame:
+    """
+    Calcule en une passe vectorisée, pour tous les nageurs et tous les indicateurs :
+        - 'EWMA'    : moyenne mobile exponentielle (span jours)
+        - 'Z-score' : écart du jour à la référence glissante (window jours précédents)
+        - 'Dérive'  : écart de l'EWMA à cette référence, en écarts-types
+        - 'Rupture' : statistique de changement de niveau (médiane des `recent` derniers
+                      jours contre la référence qui les précède)
+    Les écarts sont orientés : positifs = dans le sens défavorable (cf. TREND_METRICS).
+
+    L'historique est au format long ('Date', 'Nom', indicateurs). Il est pivoté en un
+    tableau jours × (indicateur, nageur) : chaque calcul glissant traite toutes les
+    colonnes d'un coup.
+    Retourne un DataFrame long : Date, Nom, Indicateur, Valeur, EWMA, Z-score, Dérive,
+    Rupture et les drapeaux 'Pic', 'Dérive lente', 'Changement'.
+    """
+    metrics = [m for m in (metrics or TREND_METRICS) if m in history_df.columns]
+    required_cols = ["Date", "Nom"]
+    missing = [col for col in required_cols if col not in history_df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le DataFrame : {missing}")
+    if not metrics:
+        raise ValueError("Aucun indicateur de tendance dans l'historique")
+
+    df = history_df[required_cols + metrics].copy()
+    df["Date"] = pd.to_datetime(df["Date"]).dt.normalize()
+    df[metrics] = df[metrics].apply(pd.to_numeric, errors="coerce")
+
+    # --- Pivot : une ligne par jour du calendrier, une colonne par (indicateur, nageur)
+    wide = df.pivot_table(index="Date", columns="Nom", values=metrics, aggfunc="last")
+    wide = wide.reindex(pd.date_range(wide.index.min(), wide.index.max(), freq="D"))
+    direction = np.array([TREND_METRICS.get(m, 1) for m in wide.columns.get_level_values(0)])
+
+    # --- Référence : `window` jours qui précèdent la période récente
+    ewma = wide.ewm(span=span, min_periods=min(span, min_periods), ignore_na=True).mean()
+    base_mean = wide.rolling(window, min_periods=min_periods).mean().shift(recent)
+    base_std = wide.rolling(window, min_periods=min_periods).std().shift(recent).clip(lower=MIN_STD)
+    # Médiane : un pic isolé reste un 'Pic', il ne suffit pas à signaler un changement de niveau
+    recent_level = wide.rolling(recent, min_periods=max(1, recent - 1)).median()
+
+    zscore = (wide - base_mean) / base_std * direction
+    drift = (ewma - base_mean) / base_std * direction
+    shift = (recent_level - base_mean) / (base_std / np.sqrt(recent)) * direction
+
+    # --- Retour au format long (uniquement les jours mesurés)
+    out = pd.concat(
+        {"Valeur": wide, "EWMA": ewma, "Z-score": zscore, "Dérive": drift, "Rupture": shift},
+        axis=1,
+    )
+    out.columns.names = ["Mesure", "Indicateur", "Nom"]
+    out.index.name = "Date"
+    out = out.stack(["Indicateur", "Nom"], future_stack=True).reset_index()
+    out = out[out["Valeur"].notna()]
+
+    out = out.sort_values(["Indicateur", "Nom", "Date"])
+    series = [out["Indicateur"], out["Nom"]]
+
+    def persistent(condition):
+        # Vrai si la condition tient sur les `persistence` dernières mesures du nageur
+        held = condition.copy()
+        for lag in range(1, persistence):
+            held &= condition.groupby(series).shift(lag, fill_value=False)
+        return held
+
+    out["Pic"] = out["Z-score"] >= z_threshold
+    out["Dérive lente"] = persistent(out["Dérive"] >= drift_threshold)
+    out["Changement"] = persistent(out["Rupture"] >= shift_threshold)
+    return out.sort_values(["Nom", "Date", "Indicateur"]).reset_index(drop=True)
+
+def trend_alerts(flags_df: pd.DataFrame, report_date=None, max_age_days=1) -> dict:
+    """
+    Messages d'alerte par nageur pour le jour du rapport (dernière mesure datant
+    d'au plus `max_age_days` jours) : {Nom: [messages]}.
+    """
+    if flags_df.empty:
+        return {}
+    report_ts = pd.Timestamp(report_date).normalize() if report_date is not None else flags_df["Date"].max()
+    day = flags_df[(flags_df["Date"] <= report_ts) & (flags_df["Date"] >= report_ts - pd.Timedelta(days=max_age_days))]
+    day = day[day["Date"] == day.groupby("Nom")["Date"].transform("max")]
+    day = day[day["Pic"] | day["Dérive lente"] | day["Changement"]]
+
+    alerts = {}
+    for row in day.to_dict("records"):
+        sens = "hausse" if TREND_METRICS.get(row["Indicateur"], 1) > 0 else "baisse"
+        if row["Changement"]:
+            msg = f"{row['Indicateur']} : changement de niveau ({sens} sur les derniers jours)"
+        elif row["Pic"]:
+            msg = f"{row['Indicateur']} : valeur inhabituelle ({row['Valeur']:.0f}, {sens} de {row['Z-score']:.1f} σ)"
+        else:
+            msg = f"{row['Indicateur']} : {sens} progressive ({row['Dérive']:.1f} σ, moyenne mobile)"
+        alerts.setdefault(row["Nom"], []).append(msg)
+    return alerts
+
+def athlete_trend_alerts(history_df: pd.DataFrame, athletes: list, report_date, **kwargs) -> dict:
+    """
+    Alertes du jour pour les athlètes saisis : leurs valeurs du jour sont ajoutées à
+    l'historique (elles remplacent une éventuelle ligne à la même date) avant le calcul.
+    """
+    today = pd.DataFrame([{k: v for k, v in a.items() if k == "Nom" or k in TREND_METRICS} for a in athletes])
+    if today.empty or history_df is None or history_df.empty:
+        return {}
+    today["Date"] = pd.Timestamp(report_date).normalize()
+    merged = pd.concat([history_df, today], ignore_index=True)
+    flags = compute_trend_flags(merged, **kwargs)
+    return trend_alerts(flags, report_date)
@@ -1,92 +1,130 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from matplotlib.cm import get_cmap
+from matplotlib import colormaps
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import BoundaryNorm, ListedColormap
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
 from matplotlib.patches import Polygon
+from contextlib import contextmanager
 import numpy as np
+import threading
+from hrv_memory import track_figure
 
-def create_daily_chart_matplotlib(
-    df: pd.DataFrame,
-    save_path: str = "./temp_chart/daily_chart_matplotlib.png",
-    figsize=(8, 7)
-):
+@contextmanager
+def managed_figure(**kwargs):
     """
-    Crée un graphique quotidien (régénération vs capacité d’effort)
-    à partir d’un DataFrame déjà chargé en mémoire.
-
-    Le DataFrame doit contenir :
-        - 'Nageur'
-        - '% régénération'
-        - '% capacité d'effort'
-        - '% réserve'
+    Figure autonome avec son propre canevas Agg, sans passer par l'état global
+    de pyplot : plusieurs sessions Streamlit (threads) peuvent tracer en même temps.
+    La figure est vidée quoi qu'il arrive (même si le tracé lève une exception).
     """
+    fig = track_figure(Figure(**kwargs))
+    FigureCanvasAgg(fig)
+    try:
+        yield fig
+    finally:
+        fig.clear()
 
-    # --- Vérification des colonnes requises
-    required_cols = ["Nom", "% Régénération", "% Capacité Effort", "% Réserve"]
-    missing = [col for col in required_cols if col not in df.columns]
-    if missing:
-        raise ValueError(f"Colonnes manquantes dans le DataFrame : {missing}")
-
-    # --- Définir les nageurs et couleurs
-    nageurs = df["Nom"].unique()
-    cmap = get_cmap("Set1")
-    colors = [cmap(i) for i in range(len(nageurs))]
-
-    # --- Créer la figure
-    fig, ax = plt.subplots(figsize=figsize)
-
-    # === Couleurs de fond ===
-    def add_rect(x0, x1, y0, y1, color, alpha=0.3):
-        ax.add_patch(
-            patches.Rectangle(
-                (x0, y0), x1 - x0, y1 - y0,
-                facecolor=color, alpha=alpha, linewidth=0
-            )
-        )
-
+# ================================
+# 🔹 Zones du graphique quotidien
+# ================================
+# (x0, x1, y0, y1, couleur, alpha) en % Capacité Effort (x) / % Régénération (y).
+# L'ordre compte : une zone dessinée plus tard recouvre les précédentes.
+DAILY_ZONES = [
     # 🔴 Rouge (0-30%)
-    add_rect(0, 30, 0, 30, "red", 0.3)
+    (0, 30, 0, 30, "red", 0.3),
 
     # 🟠 Orange (zones vigilance)
-    add_rect(30, 100, 0, 30, "orange", 0.3)
-    add_rect(0, 30, 30, 100, "orange", 0.3)
-    add_rect(30, 60, 30, 60, "orange", 0.3)
+    (30, 100, 0, 30, "orange", 0.3),
+    (0, 30, 30, 100, "orange", 0.3),
+    (30, 60, 30, 60, "orange", 0.3),
 
     # 🟡 Jaune (zones correctes)
-    add_rect(0, 30, 100, 200, "yellow", 0.3)
-    add_rect(30, 60, 60, 120, "yellow", 0.3)
-    add_rect(60, 120, 30, 60, "yellow", 0.3)
-    add_rect(100, 200, 0, 30, "yellow", 0.3)
-    add_rect(60, 90, 60, 90, "yellow", 0.3)
+    (0, 30, 100, 200, "yellow", 0.3),
+    (30, 60, 60, 120, "yellow", 0.3),
+    (60, 120, 30, 60, "yellow", 0.3),
+    (100, 200, 0, 30, "yellow", 0.3),
+    (60, 90, 60, 90, "yellow", 0.3),
 
     # 🟢 Vert (zones supérieures)
-    add_rect(90, 200, 120, 200, "green", 0.1)
-    add_rect(120, 200, 90, 200, "green", 0.1)
+    (90, 200, 120, 200, "green", 0.1),
+    (120, 200, 90, 200, "green", 0.1),
 
     # 🔵 Bleu (zones très hautes)
-    add_rect(80, 120, 150, 200, "blue", 0.1)
-    add_rect(150, 200, 80, 120, "blue", 0.1)
-
-    # === Tracer les points par nageur ===
-    for i, nageur in enumerate(nageurs):
-        sub = df[df["Nom"] == nageur]
-        ax.scatter(
-            sub["% Capacité Effort"],
-            sub["% Régénération"],
-            s=400,              # taille fixe des marqueurs
-            color=colors[i],
-            edgecolors="black",
-            linewidth=1,
-            alpha=0.85,
-            label=nageur
-        )
-        # Ajouter le texte du % réserve au centre du marker
-        for _, row in sub.iterrows():
-            ax.text(
-                row["% Capacité Effort"], row["% Régénération"],
-                str(int(row["% Réserve"])),
-                ha="center", va="center", fontsize=7, fontweight="bold"
+    (80, 120, 150, 200, "blue", 0.1),
+    (150, 200, 80, 120, "blue", 0.1),
+]
+
+# Code entier de chaque couleur de zone (0 = hors zone) pour la heatmap
+ZONE_LEVELS = [
+    ("Hors zone", "white"),
+    ("Danger", "red"),
+    ("Vigilance", "orange"),
+    ("Correct", "yellow"),
+    ("OK", "green"),
+    ("Très haut", "blue"),
+]
+ZONE_CODES = {color: code for code, (_, color) in enumerate(ZONE_LEVELS)}
+
+# Cases de la heatmap sans mesure ce jour-là
+MISSING_DAY_STYLE = {"facecolor": "#9e9e9e", "edgecolor": "#5f5f5f", "hatch": "///", "linewidth": 0}
+
+
+def classify_daily_zone(effort, regen) -> np.ndarray:
+    """
+    Code de zone (cf. ZONE_LEVELS) pour chaque couple
+    (% Capacité Effort, % Régénération), calculé en une passe vectorisée.
+    Les valeurs manquantes donnent NaN.
+    """
+    # Les valeurs au-delà de 200 % restent dans la zone du bord du graphique
+    upper = np.nextafter(200, 0)
+    effort = np.clip(np.asarray(effort, dtype=float), 0, upper)
+    regen = np.clip(np.asarray(regen, dtype=float), 0, upper)
+    codes = np.zeros(np.broadcast(effort, regen).shape, dtype=float)
+
+    # Même ordre que le dessin : la dernière zone qui contient le point l'emporte
+    for x0, x1, y0, y1, color, _ in DAILY_ZONES:
+        inside = (effort >= x0) & (effort < x1) & (regen >= y0) & (regen < y1)
+        codes[inside] = ZONE_CODES[color]
+
+    codes[np.isnan(effort) | np.isnan(regen)] = np.nan
+    return codes
+
+# Légende du graphique quotidien : largeur d'une colonne et hauteur d'une ligne (pouces)
+DAILY_LEGEND_COL_W = 2.2
+DAILY_LEGEND_ROW_H = 0.27
+
+def daily_legend_columns(n_nageurs: int, figsize) -> int:
+    """Nombre de colonnes de légende pour que tous les nageurs tiennent dans la hauteur."""
+    rows_per_col = max(1, int((figsize[1] - 1.2) / DAILY_LEGEND_ROW_H))
+    return max(1, int(np.ceil(n_nageurs / rows_per_col)))
+
+# Fonds pré-rendus du graphique quotidien, par (figsize, dpi, colonnes de légende) : figures libres
+# prêtes à être réutilisées. Une figure n'est utilisée que par un thread à la fois.
+_DAILY_BACKGROUNDS = {}
+_DAILY_BACKGROUNDS_LOCK = threading.Lock()
+
+def _render_daily_background(figsize, dpi, legend_cols=1):
+    """
+    Figure du graphique quotidien sans les nageurs (zones, grille, axes, titre),
+    rendue une seule fois puis gardée en mémoire avec son fond (copy_from_bbox)
+    pour être restaurée à chaque appel.
+    """
+    # Mise en page fixe (pas de tight_layout) : place réservée à droite pour la légende
+    legend_w = DAILY_LEGEND_COL_W * legend_cols
+    fig_w, fig_h = figsize[0] + legend_w, figsize[1]
+    fig = track_figure(Figure(figsize=(fig_w, fig_h), dpi=dpi), cached=True)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0.9 / fig_w, 0.7 / fig_h, (figsize[0] - 1.2) / fig_w, (fig_h - 1.5) / fig_h])
+
+    # === Couleurs de fond ===
+    for x0, x1, y0, y1, color, alpha in DAILY_ZONES:
+        ax.add_patch(
+            patches.Rectangle(
+                (x0, y0), x1 - x0, y1 - y0,
+                facecolor=color, alpha=alpha, linewidth=0
             )
+        )
 
     # # === Lignes centrales (50%) ===
     # ax.axvline(50, color="darkblue", linestyle="--", linewidth=1)
@@ -95,41 +133,141 @@ def create_daily_chart_matplotlib(
     # === Mise en forme ===
     ax.set_xlim(0, 200)
     ax.set_ylim(0, 200)
+    ax.set_autoscale_on(False)  # les points ajoutés ensuite ne doivent pas changer les axes
     ax.set_xlabel("% Capacité d’effort", fontsize=10)
     ax.set_ylabel("% Régénération", fontsize=10)
     ax.set_title("Évolution quotidienne : Régénération vs Capacité d’effort ASM Natation",
                  fontsize=12, fontweight="bold", pad=15)
     ax.grid(True, alpha=0.3)
-    
-    # === Légende propre en haut à droite (hors du graphique)
-    # On crée la légende manuellement pour mieux contrôler les tailles
-    handles, labels = ax.get_legend_handles_labels()
-    leg = ax.legend(
-        handles,
-        labels,
-        title="Nageurs",
-        title_fontsize=11,
-        fontsize=9,
-        loc="upper left",
-        bbox_to_anchor=(1.02, 1.0),
-        frameon=False,
-        scatterpoints=1,
-        markerscale=0.7,
-        handleheight=1.5,
-        handlelength=1.2,
-        handletextpad=0.6,
-        borderaxespad=0.2,
-        labelspacing=0.6,   # 🔧 espace vertical entre lignes
-    )
-    
-    # Supprime les marges inutiles
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=150, bbox_inches="tight")
-    plt.close(fig)
+
+    fig.canvas.draw()
+    return fig, ax, fig.canvas.copy_from_bbox(fig.bbox)
+
+@contextmanager
+def _daily_chart_background(figsize, dpi, legend_cols=1):
+    """
+    Emprunte une figure de fond libre pour (figsize, dpi, legend_cols), ou en rend une
+    nouvelle si toutes sont occupées par d'autres sessions. Elle est rendue au pool à la sortie.
+    """
+    key = (tuple(figsize), dpi, legend_cols)
+    with _DAILY_BACKGROUNDS_LOCK:
+        pool = _DAILY_BACKGROUNDS.setdefault(key, [])
+        entry = pool.pop() if pool else None
+    if entry is None:
+        entry = _render_daily_background(figsize, dpi, legend_cols)
+    try:
+        yield entry
+    finally:
+        with _DAILY_BACKGROUNDS_LOCK:
+            pool.append(entry)
+
+def create_daily_chart_matplotlib(
+    df: pd.DataFrame,
+    save_path: str = "./temp_chart/daily_chart_matplotlib.png",
+    figsize=(8, 7),
+    dpi=150
+):
+    """
+    Crée un graphique quotidien (régénération vs capacité d’effort)
+    à partir d’un DataFrame déjà chargé en mémoire.
+
+    Le DataFrame doit contenir :
+        - 'Nageur'
+        - '% régénération'
+        - '% capacité d'effort'
+        - '% réserve'
+
+    Le fond (zones, grille, titres) est mis en cache : seuls les nageurs,
+    leurs étiquettes et la légende sont dessinés à chaque appel.
+    """
+
+    # --- Vérification des colonnes requises
+    required_cols = ["Nom", "% Régénération", "% Capacité Effort", "% Réserve"]
+    missing = [col for col in required_cols if col not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le DataFrame : {missing}")
+
+    # --- Définir les nageurs et couleurs
+    nageurs = df["Nom"].unique()
+    cmap = colormaps["Set1"]
+    colors = [cmap(i) for i in range(len(nageurs))]
+    # Grands groupes : la légende passe sur plusieurs colonnes (et la figure s'élargit)
+    legend_cols = daily_legend_columns(len(nageurs), figsize)
+
+    # --- Emprunter un fond pré-rendu et le restaurer
+    with _daily_chart_background(figsize, dpi, legend_cols) as (fig, ax, background):
+        fig.canvas.restore_region(background)
+
+        # === Tracer les points par nageur ===
+        artists = []
+        try:
+            for i, nageur in enumerate(nageurs):
+                sub = df[df["Nom"] == nageur]
+                artists.append(ax.scatter(
+                    sub["% Capacité Effort"],
+                    sub["% Régénération"],
+                    s=400,              # taille fixe des marqueurs
+                    color=colors[i],
+                    edgecolors="black",
+                    linewidth=1,
+                    alpha=0.85,
+                    label=nageur
+                ))
+                # Ajouter le texte du % réserve au centre du marker
+                for _, row in sub.iterrows():
+                    artists.append(ax.text(
+                        row["% Capacité Effort"], row["% Régénération"],
+                        str(int(row["% Réserve"])),
+                        ha="center", va="center", fontsize=7, fontweight="bold"
+                    ))
+
+            # === Légende propre en haut à droite (hors du graphique)
+            # On crée la légende manuellement pour mieux contrôler les tailles
+            handles, labels = ax.get_legend_handles_labels()
+            leg = ax.legend(
+                handles,
+                labels,
+                title="Nageurs",
+                title_fontsize=11,
+                ncol=legend_cols,
+                columnspacing=1.0,
+                fontsize=9,
+                loc="upper left",
+                bbox_to_anchor=(1.02, 1.0),
+                frameon=False,
+                scatterpoints=1,
+                markerscale=0.7,
+                handleheight=1.5,
+                handlelength=1.2,
+                handletextpad=0.6,
+                borderaxespad=0.2,
+                labelspacing=0.6,   # 🔧 espace vertical entre lignes
+            )
+            artists.append(leg)
+
+            # --- Composer uniquement les éléments du jour sur le fond
+            for artist in artists:
+                ax.draw_artist(artist)
+            imsave(save_path, np.asarray(fig.canvas.buffer_rgba()), dpi=dpi)
+        finally:
+            # Remet la figure dans son état d'origine avant de la rendre au pool
+            for artist in artists:
+                artist.remove()
 
     print(f"✅ Graphique sauvegardé : {save_path}")
     return save_path
 
+def select_mean_row(reference_df: pd.DataFrame, nom: str) -> pd.Series:
+    """Ligne '{Nom} Moyenne' de la table de référence, sinon la première ligne 'Moyenne'."""
+    mean_row = reference_df.loc[
+        reference_df.index.str.contains(fr"^{nom}", case=False, na=False)
+    ]
+    if not mean_row.empty:
+        return mean_row.iloc[0]
+    # fallback : ligne "Moyenne" ou la première ligne moyenne dispo
+    mean_candidates = reference_df[reference_df.index.str.contains("Moyenne", case=False, na=False)]
+    return mean_candidates.iloc[0] if not mean_candidates.empty else reference_df.iloc[0]
+
 # ================================
 # 🔹 FONCTION 1 : Radar 5 axes
 # ================================
@@ -145,9 +283,6 @@ def create_radar_chart(
     Gère automatiquement la ligne '{Nom} Moyenne' si elle existe.
     """
 
-    import numpy as np
-    import matplotlib.pyplot as plt
-
     categories = ['% Capacité Effort', '% Réserve', '% Régénération', 'FC Couché', 'FC Debout']
     N = len(categories)
     angles = np.linspace(0, 2 * np.pi, N, endpoint=False).tolist()
@@ -156,62 +291,56 @@ def create_radar_chart(
     nom = athlete_data.get("Nom", "Athlète")
 
     # ✅ Sélection de la bonne ligne moyenne (ex: "Marius Moyenne")
-    mean_row = reference_df.loc[
-        reference_df.index.str.contains(fr"^{nom}", case=False, na=False)
-    ]
-    if not mean_row.empty:
-        mean_row = mean_row.iloc[0]
-    else:
-        # fallback : ligne "Moyenne" ou la première ligne moyenne dispo
-        mean_candidates = reference_df[reference_df.index.str.contains("Moyenne", case=False, na=False)]
-        mean_row = mean_candidates.iloc[0] if not mean_candidates.empty else reference_df.iloc[0]
+    mean_row = select_mean_row(reference_df, nom)
 
     # === Données ===
     athlete_values = [athlete_data[c] for c in categories] + [athlete_data[categories[0]]]
     mean_values = mean_row[categories].tolist() + [mean_row[categories[0]]]
 
     # === Figure ===
-    fig, ax = plt.subplots(figsize=figsize, subplot_kw=dict(polar=True))
-    ax.set_theta_offset(np.pi / 2)
-    ax.set_theta_direction(-1)
-    ax.set_ylim(0, 200)
-    ax.grid(False)
-    ax.spines['polar'].set_visible(False)
+    with managed_figure(figsize=figsize) as fig:
+        ax = fig.add_subplot(polar=True)
+        ax.set_theta_offset(np.pi / 2)
+        ax.set_theta_direction(-1)
+        ax.set_ylim(0, 200)
+        ax.grid(False)
+        ax.spines['polar'].set_visible(False)
+
+        # === Zones colorées selon les seuils ===
+        def vals(level): return reference_df.loc[level, categories].tolist() + [reference_df.loc[level, categories[0]]]
+
+        try:
+            danger_vals = vals("DANGER")
+            vigil_vals  = vals("VIGILANCE")
+            correct_vals= vals("CORRECT")
+            ok_vals     = vals("OK")
+
+            ax.fill(angles, danger_vals, color="red", alpha=0.2, label="Danger")
+            ax.fill_between(angles, danger_vals, vigil_vals, color="orange", alpha=0.2)
+            ax.fill_between(angles, vigil_vals, correct_vals, color="lightblue", alpha=0.2)
+            ax.fill_between(angles, correct_vals, ok_vals, color="lightgreen", alpha=0.2)
+            ax.fill_between(angles, ok_vals, [200]*len(ok_vals), color="green", alpha=0.15)
+        except KeyError:
+            print(f"⚠️ Seuils manquants dans la table de référence pour {nom}")
+
+        # === Moyenne (gris pointillé)
+        ax.plot(angles, mean_values, color="gray", linewidth=1.8, linestyle="dashed", label=f"{nom} Moyenne")
+        ax.fill(angles, mean_values, color="gray", alpha=0.08)
+
+        # === Athlète
+        ax.plot(angles, athlete_values, color="#C40B71", linewidth=2.2, label=nom)
+        ax.fill(angles, athlete_values, color="#C40B71", alpha=0.25)
+
+        # === Esthétique
+        ax.set_xticks(angles[:-1])
+        ax.set_xticklabels(categories, fontsize=9, weight="bold")
+        ax.set_yticks(np.arange(0, 201, 25))
+        ax.set_yticklabels([str(v) for v in range(0, 201, 25)], fontsize=7, color="gray")
+        ax.legend(loc="upper right", bbox_to_anchor=(1.2, 1.1), frameon=False, fontsize=8)
+
+        fig.tight_layout()
+        fig.savefig(save_path, dpi=150, bbox_inches="tight")
 
-    # === Zones colorées selon les seuils ===
-    def vals(level): return reference_df.loc[level, categories].tolist() + [reference_df.loc[level, categories[0]]]
-
-    try:
-        danger_vals = vals("DANGER")
-        vigil_vals  = vals("VIGILANCE")
-        correct_vals= vals("CORRECT")
-        ok_vals     = vals("OK")
-
-        ax.fill(angles, danger_vals, color="red", alpha=0.2, label="Danger")
-        ax.fill_between(angles, danger_vals, vigil_vals, color="orange", alpha=0.2)
-        ax.fill_between(angles, vigil_vals, correct_vals, color="lightblue", alpha=0.2)
-        ax.fill_between(angles, correct_vals, ok_vals, color="lightgreen", alpha=0.2)
-        ax.fill_between(angles, ok_vals, [200]*len(ok_vals), color="green", alpha=0.15)
-    except KeyError:
-        print(f"⚠️ Seuils manquants dans la table de référence pour {nom}")
-
-    # === Moyenne (gris pointillé)
-    ax.plot(angles, mean_values, color="gray", linewidth=1.8, linestyle="dashed", label=f"{nom} Moyenne")
-    ax.fill(angles, mean_values, color="gray", alpha=0.08)
-
-    # === Athlète
-    ax.plot(angles, athlete_values, color="#C40B71", linewidth=2.2, label=nom)
-    ax.fill(angles, athlete_values, color="#C40B71", alpha=0.25)
-
-    # === Esthétique
-    plt.xticks(angles[:-1], categories, fontsize=9, weight="bold")
-    ax.set_yticks(np.arange(0, 201, 25))
-    ax.set_yticklabels([str(v) for v in range(0, 201, 25)], fontsize=7, color="gray")
-    ax.legend(loc="upper right", bbox_to_anchor=(1.2, 1.1), frameon=False, fontsize=8)
-
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=150, bbox_inches="tight")
-    plt.close(fig)
     print(f"✅ Radar chart sauvegardé : {save_path}")
     return save_path
 
@@ -229,9 +358,6 @@ def create_triangle_chart(
     Triangle chart (radar 3 axes) comparant l'athlète et sa ligne '{Nom} Moyenne'.
     """
 
-    import numpy as np
-    import matplotlib.pyplot as plt
-
     categories = ['% Capacité Effort', '% Réserve', '% Régénération']
     N = len(categories)
     angles = np.linspace(0, 2 * np.pi, N, endpoint=False).tolist()
@@ -240,50 +366,149 @@ def create_triangle_chart(
     nom = athlete_data.get("Nom", "Athlète")
 
     # ✅ Sélection de la bonne ligne moyenne
-    mean_row = reference_df.loc[
-        reference_df.index.str.contains(fr"^{nom}", case=False, na=False)
-    ]
-    if not mean_row.empty:
-        mean_row = mean_row.iloc[0]
-    else:
-        mean_candidates = reference_df[reference_df.index.str.contains("Moyenne", case=False, na=False)]
-        mean_row = mean_candidates.iloc[0] if not mean_candidates.empty else reference_df.iloc[0]
+    mean_row = select_mean_row(reference_df, nom)
 
     athlete_values = [athlete_data[c] for c in categories] + [athlete_data[categories[0]]]
     mean_values = mean_row[categories].tolist() + [mean_row[categories[0]]]
 
-    fig, ax = plt.subplots(figsize=figsize, subplot_kw=dict(polar=True))
-    ax.set_theta_offset(np.pi / 2)
-    ax.set_theta_direction(-1)
-    ax.set_ylim(0, 200)
-    ax.grid(False)
-    ax.spines['polar'].set_visible(False)
-
-    # --- Axes de fond
-    for r in range(25, 201, 25):
-        ax.plot(angles, [r] * (N + 1), color="gray", linewidth=0.3, alpha=0.5, linestyle='dotted')
-    for angle in angles[:-1]:
-        ax.plot([angle, angle], [0, 200], color="gray", linewidth=0.8, alpha=0.6)
-
-    # --- Moyenne
-    ax.plot(angles, mean_values, color="gray", linewidth=1.8, linestyle="dashed", label=f"{nom} Moyenne")
-    ax.fill(angles, mean_values, color="gray", alpha=0.1)
-
-    # --- Athlète
-    ax.plot(angles, athlete_values, color="#C40B71", linewidth=2.2, label=nom)
-    ax.fill(angles, athlete_values, color="#C40B71", alpha=0.25)
-
-    plt.xticks(angles[:-1], categories, fontsize=9, weight="bold")
-    ax.set_yticks(np.arange(0, 201, 25))
-    ax.set_yticklabels([str(v) for v in range(0, 201, 25)], fontsize=7, color="gray")
-    ax.legend(loc="upper right", bbox_to_anchor=(1.2, 1.1), frameon=False, fontsize=8)
-
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=150, bbox_inches="tight")
-    plt.close(fig)
+    with managed_figure(figsize=figsize) as fig:
+        ax = fig.add_subplot(polar=True)
+        ax.set_theta_offset(np.pi / 2)
+        ax.set_theta_direction(-1)
+        ax.set_ylim(0, 200)
+        ax.grid(False)
+        ax.spines['polar'].set_visible(False)
+
+        # --- Axes de fond
+        for r in range(25, 201, 25):
+            ax.plot(angles, [r] * (N + 1), color="gray", linewidth=0.3, alpha=0.5, linestyle='dotted')
+        for angle in angles[:-1]:
+            ax.plot([angle, angle], [0, 200], color="gray", linewidth=0.8, alpha=0.6)
+
+        # --- Moyenne
+        ax.plot(angles, mean_values, color="gray", linewidth=1.8, linestyle="dashed", label=f"{nom} Moyenne")
+        ax.fill(angles, mean_values, color="gray", alpha=0.1)
+
+        # --- Athlète
+        ax.plot(angles, athlete_values, color="#C40B71", linewidth=2.2, label=nom)
+        ax.fill(angles, athlete_values, color="#C40B71", alpha=0.25)
+
+        ax.set_xticks(angles[:-1])
+        ax.set_xticklabels(categories, fontsize=9, weight="bold")
+        ax.set_yticks(np.arange(0, 201, 25))
+        ax.set_yticklabels([str(v) for v in range(0, 201, 25)], fontsize=7, color="gray")
+        ax.legend(loc="upper right", bbox_to_anchor=(1.2, 1.1), frameon=False, fontsize=8)
+
+        fig.tight_layout()
+        fig.savefig(save_path, dpi=150, bbox_inches="tight")
+
     print(f"✅ Triangle chart sauvegardé : {save_path}")
     return save_path
 
+# ================================
+# 🔹 FONCTION 3 : Heatmap période
+# ================================
+
+def create_period_heatmap(
+    history_df: pd.DataFrame,
+    metric: str = "Zone",
+    start=None,
+    end=None,
+    save_path: str = "./temp_chart/period_heatmap.png",
+    figsize=(11, 7)
+):
+    """
+    Heatmap nageurs × jours sur une période.
+
+    Le DataFrame d'historique est au format long (une ligne par nageur et par jour) :
+        - 'Date'
+        - 'Nom'
+        - la colonne `metric` (ex: '% Réserve', 'FC Couché'),
+          ou '% Capacité Effort' et '% Régénération' si metric == "Zone"
+
+    Les données sont pivotées en un tableau NumPy puis tracées en une seule
+    image (imshow) : le coût ne dépend pas du nombre de cases.
+    """
+
+    needed = ["% Capacité Effort", "% Régénération"] if metric == "Zone" else [metric]
+    required_cols = ["Date", "Nom"] + needed
+    missing = [col for col in required_cols if col not in history_df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le DataFrame : {missing}")
+
+    df = history_df[required_cols].copy()
+    df["Date"] = pd.to_datetime(df["Date"]).dt.normalize()
+    if start is not None:
+        df = df[df["Date"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["Date"] <= pd.Timestamp(end)]
+    if df.empty:
+        raise ValueError("Aucune donnée d'historique sur la période demandée")
+
+    # --- Valeur par case (Zone = code calculé en une passe vectorisée)
+    if metric == "Zone":
+        df["valeur"] = classify_daily_zone(df["% Capacité Effort"], df["% Régénération"])
+    else:
+        df["valeur"] = pd.to_numeric(df[metric], errors="coerce")
+
+    # --- Pivot : lignes = nageurs, colonnes = tous les jours de la période
+    days = pd.date_range(df["Date"].min(), df["Date"].max(), freq="D")
+    grid = (
+        df.pivot_table(index="Nom", columns="Date", values="valeur", aggfunc="last")
+        .reindex(columns=days)
+    )
+    values = np.ma.masked_invalid(grid.to_numpy(dtype=float))
+    nageurs = grid.index.tolist()
+
+    # --- Créer la figure
+    with managed_figure(figsize=figsize) as fig:
+        ax = fig.add_subplot()
+
+        if metric == "Zone":
+            cmap = ListedColormap([color for _, color in ZONE_LEVELS])
+            norm = BoundaryNorm(np.arange(len(ZONE_LEVELS) + 1) - 0.5, cmap.N)
+        else:
+            cmap = colormaps["RdYlGn_r" if metric.startswith("FC") else "RdYlGn"]
+            norm = None
+        # Jours sans mesure : cases transparentes laissant voir un fond hachuré gris
+        # (distinct de "Hors zone", blanc, et de toutes les couleurs des échelles)
+        cmap = cmap.with_extremes(bad=(0, 0, 0, 0))
+        ax.add_patch(patches.Rectangle(
+            (-0.5, -0.5), len(days), len(nageurs), zorder=0, **MISSING_DAY_STYLE
+        ))
+
+        img = ax.imshow(values, aspect="auto", interpolation="nearest", cmap=cmap, norm=norm, zorder=1)
+
+        # === Axes : un nom par ligne, ~15 dates maximum en abscisse
+        ax.set_yticks(np.arange(len(nageurs)))
+        ax.set_yticklabels(nageurs, fontsize=max(4, min(9, 400 // max(len(nageurs), 1))))
+        step = max(1, int(np.ceil(len(days) / 15)))
+        ax.set_xticks(np.arange(0, len(days), step))
+        ax.set_xticklabels([d.strftime("%d/%m") for d in days[::step]], fontsize=8, rotation=45, ha="right")
+
+        # === Barre de couleur
+        cbar = fig.colorbar(img, ax=ax, fraction=0.04, pad=0.02)
+        if metric == "Zone":
+            cbar.set_ticks(np.arange(len(ZONE_LEVELS)))
+            cbar.set_ticklabels([label for label, _ in ZONE_LEVELS])
+        else:
+            cbar.set_label(metric, fontsize=9)
+        cbar.ax.tick_params(labelsize=8)
+        ax.legend(
+            handles=[patches.Patch(label="Pas de mesure", **MISSING_DAY_STYLE)],
+            loc="upper left", bbox_to_anchor=(1.0, -0.02), fontsize=8, frameon=False,
+            handlelength=1.5, handleheight=1.2,
+        )
+
+        periode = f"{days[0].strftime('%d/%m/%Y')} → {days[-1].strftime('%d/%m/%Y')}"
+        ax.set_title(f"Vue d'ensemble : {metric} ({periode})", fontsize=12, fontweight="bold", pad=15)
+
+        fig.tight_layout()
+        fig.savefig(save_path, dpi=150, bbox_inches="tight")
+
+    print(f"✅ Heatmap sauvegardée : {save_path}")
+    return save_path
+
 # === Exemple d’utilisation ===
 if __name__ == "__main__":
     df_ref = pd.DataFrame({
@@ -0,0 +1,110 @@
+"""
+Test d'endurance mémoire : génère des milliers de rapports à la suite dans le même
+processus (comme le serveur Streamlit sur plusieurs semaines) et échoue si la
+mémoire résidente continue de grimper après la phase de chauffe.
+
+    python soak_test.py --reports 2000 --athletes 8 --max-growth-mb 40
+"""
+import argparse
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from matplotlib_chart import create_daily_chart_matplotlib, create_radar_chart, create_triangle_chart
+from hrv_pdf import generate_hrv_report
+from hrv_memory import current_rss_bytes, memory_probe, open_figures_count
+
+REFERENCE = pd.DataFrame({
+    "Niveau": ["Moyenne", "DANGER", "VIGILANCE", "CORRECT", "OK"],
+    "% Capacité Effort": [100, 40, 80, 120, 150],
+    "% Réserve": [100, 40, 80, 120, 150],
+    "% Régénération": [100, 40, 80, 120, 150],
+    "FC Couché": [61, 40, 80, 120, 150],
+    "FC Debout": [90, 40, 80, 120, 150],
+}).set_index("Niveau")
+
+LEGEND_ICONS = {
+    "menstruation": "./icons/menstruation.png",
+    "ok": "./icons/ok.png",
+    "vigilance": "./icons/vigilance.png",
+    "danger": "./icons/danger.png",
+}
+
+def random_athletes(rng, n):
+    return [{
+        "Nom": f"Nageur {i + 1}",
+        "% Régénération": int(rng.integers(10, 190)),
+        "% Capacité Effort": int(rng.integers(10, 190)),
+        "% Réserve": int(rng.integers(10, 190)),
+        "FC Couché": int(rng.integers(45, 75)),
+        "FC Debout": int(rng.integers(70, 120)),
+        "Menstruation": bool(rng.integers(0, 2)),
+        "Recommandations": ["OK", "Vigilance", "Danger"][int(rng.integers(0, 3))],
+        "Commentaires": "Séance de test d'endurance mémoire.",
+    } for i in range(n)]
+
+def render_report(work_dir, report_date, athletes):
+    """Même enchaînement que le bouton 'Générer le rapport PDF' de app.py."""
+    daily = create_daily_chart_matplotlib(pd.DataFrame(athletes), save_path=f"{work_dir}/daily.png")
+    for a in athletes:
+        nom_safe = a["Nom"].replace(" ", "_")
+        a["chart_left"] = create_radar_chart(a, REFERENCE, f"{work_dir}/radar_{nom_safe}.png")
+        a["chart_right"] = create_triangle_chart(a, REFERENCE, f"{work_dir}/triangle_{nom_safe}.png")
+    generate_hrv_report(f"{work_dir}/rapport.pdf", report_date, athletes,
+                        daily_chart_path=daily, legend_icons=LEGEND_ICONS, profile="screen")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=2000, help="nombre de rapports à générer")
+    parser.add_argument("--athletes", type=int, default=8, help="athlètes par rapport")
+    parser.add_argument("--warmup", type=int, default=50, help="rapports ignorés (caches, imports)")
+    parser.add_argument("--max-growth-mb", type=float, default=40.0,
+                        help="croissance RSS tolérée après la chauffe")
+    parser.add_argument("--every", type=int, default=100, help="fréquence d'affichage")
+    parser.add_argument("--trace", action="store_true",
+                        help="allocations Python (tracemalloc) dans les mesures affichées")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    samples = []
+    baseline = None
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for i in range(args.reports):
+            report_date = date(2025, 1, 1) + timedelta(days=i % 365)
+            if i % args.every == 0:
+                with memory_probe(f"rapport {i}", trace=args.trace):
+                    render_report(work_dir, report_date, random_athletes(rng, args.athletes))
+            else:
+                render_report(work_dir, report_date, random_athletes(rng, args.athletes))
+
+            if open_figures_count():
+                print(f"❌ {open_figures_count()} figure(s) restée(s) ouverte(s) après le rapport {i}")
+                return 1
+            if i + 1 == args.warmup:
+                baseline = current_rss_bytes() / 2**20
+            if baseline is not None:
+                samples.append(current_rss_bytes() / 2**20)
+
+    if not samples:
+        print("⚠️ Pas assez de rapports pour dépasser la chauffe")
+        return 1
+
+    # Tendance linéaire sur la période mesurée : robuste au bruit de l'allocateur
+    x = np.arange(len(samples))
+    slope = np.polyfit(x, samples, 1)[0] if len(samples) > 1 else 0.0
+    growth = max(samples[-1] - baseline, slope * len(samples))
+    print(f"RSS après chauffe : {baseline:.0f} Mo, final : {samples[-1]:.0f} Mo, "
+          f"max : {max(samples):.0f} Mo, tendance : {slope * 1000:+.2f} Mo / 1000 rapports")
+
+    if growth > args.max_growth_mb:
+        print(f"❌ Croissance mémoire {growth:.1f} Mo > {args.max_growth_mb:.1f} Mo")
+        return 1
+    print(f"✅ Mémoire stable ({growth:+.1f} Mo sur {len(samples)} rapports)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())